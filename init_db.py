@@ -96,9 +96,9 @@ def init_database():
             db.session.add(admin_user)
             db.session.flush()  # Get the admin ID
             
-            # Create rivers/sites
-            for river in rivers_data:
-                site = MonitoringSite(
+            # Create rivers/sites in one multi-row INSERT
+            sites = [
+                MonitoringSite(
                     name=river['name'],
                     latitude=river['latitude'],
                     longitude=river['longitude'],
@@ -110,9 +110,12 @@ def init_database():
                     is_active=True,
                     created_by=admin_user.id
                 )
-                db.session.add(site)
+                for river in rivers_data
+            ]
+            db.session.bulk_save_objects(sites)
+            for river in rivers_data:
                 print(f"✓ River site '{river['name']}' created with code: {river['code']}")
-            
+
             db.session.commit()
             
             # Create supervisor and analyst users
@@ -142,11 +145,17 @@ def init_database():
                 }
             ]
             
-            # Create supervisors
-            for sup_data in supervisor_users:
-                supervisor = User(
+            # Hash each distinct password once (hashing is deliberately slow)
+            password_hashes = {
+                pw: generate_password_hash(pw)
+                for pw in {u['password'] for u in supervisor_users + analyst_users}
+            }
+
+            # Create supervisors and analysts in one multi-row INSERT
+            staff_users = [
+                User(
                     username=sup_data['username'],
-                    password_hash=generate_password_hash(sup_data['password']),
+                    password_hash=password_hashes[sup_data['password']],
                     role='supervisor',
                     full_name=sup_data['full_name'],
                     email=sup_data['email'],
@@ -154,23 +163,25 @@ def init_database():
                     is_active=True,
                     assigned_river=sup_data.get('assigned_river')
                 )
-                db.session.add(supervisor)
-                print(f"✓ Supervisor '{sup_data['username']}' created")
-            
-            # Create analysts
-            for ana_data in analyst_users:
-                analyst = User(
+                for sup_data in supervisor_users
+            ] + [
+                User(
                     username=ana_data['username'],
-                    password_hash=generate_password_hash(ana_data['password']),
+                    password_hash=password_hashes[ana_data['password']],
                     role='central_analyst',
                     full_name=ana_data['full_name'],
                     email=ana_data['email'],
                     phone='+91-9876543212',
                     is_active=True
                 )
-                db.session.add(analyst)
+                for ana_data in analyst_users
+            ]
+            db.session.bulk_save_objects(staff_users)
+            for sup_data in supervisor_users:
+                print(f"✓ Supervisor '{sup_data['username']}' created")
+            for ana_data in analyst_users:
                 print(f"✓ Analyst '{ana_data['username']}' created")
-            
+
             db.session.commit()
             
             print("\n" + "="*60)
@@ -240,28 +251,35 @@ def add_test_submissions():
                     {'days_ago': 5, 'water_level': 2.35, 'method': 'qr', 'qr_code': 'MUSI_HYDERABAD_001', 'quality': 3},
                 ]
                 
+                # Assemble plain dicts and insert them in one multi-row
+                # statement instead of flushing ORM objects one at a time;
+                # one clock read anchors all the relative timestamps
+                now = datetime.utcnow()
+                submissions = [
+                    {
+                        'user_id': field_agent.id,
+                        'site_id': site.id,
+                        'water_level': data['water_level'],
+                        'timestamp': now - timedelta(days=data['days_ago']),
+                        'gps_latitude': 17.477836,
+                        'gps_longitude': 78.356650,
+                        'photo_filename': f"sample_{data['days_ago']}.jpg",
+                        'location_verified': True,
+                        'verification_method': data['method'],
+                        'qr_code_scanned': data['qr_code'],
+                        'quality_rating': data['quality'],
+                        'notes': f"Test submission from {data['days_ago']} days ago",
+                        'sync_status': 'synced',
+                        'sync_attempts': 1,
+                        'last_sync_attempt': now - timedelta(days=data['days_ago'], hours=1),
+                        'sync_error': None
+                    }
+                    for data in test_data
+                ]
+                db.session.bulk_insert_mappings(WaterLevelSubmission, submissions)
                 for data in test_data:
-                    submission = WaterLevelSubmission(
-                        user_id=field_agent.id,
-                        site_id=site.id,
-                        water_level=data['water_level'],
-                        timestamp=datetime.utcnow() - timedelta(days=data['days_ago']),
-                        gps_latitude=17.477836,
-                        gps_longitude=78.356650,
-                        photo_filename=f"sample_{data['days_ago']}.jpg",
-                        location_verified=True,
-                        verification_method=data['method'],
-                        qr_code_scanned=data['qr_code'],
-                        quality_rating=data['quality'],
-                        notes=f"Test submission from {data['days_ago']} days ago",
-                        sync_status='synced',
-                        sync_attempts=1,
-                        last_sync_attempt=datetime.utcnow() - timedelta(days=data['days_ago'], hours=1),
-                        sync_error=None
-                    )
-                    db.session.add(submission)
                     print(f"✓ Created test submission for {data['days_ago']} days ago - Quality: {data['quality']}")
-                
+
                 db.session.commit()
                 print("✓ Test submissions added with quality ratings")
         except Exception as e:
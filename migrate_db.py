@@ -1,46 +1,159 @@
 from app import create_app
 from models import db
-from sqlalchemy import text
-import os
+from sqlalchemy import MetaData, text
+from sqlalchemy.schema import CreateTable, CreateIndex
+
+# Bumped when migrate_database learns a new schema change; stored in the
+# database via PRAGMA user_version so restarts with a current schema can
+# skip all schema probing
+_SCHEMA_VERSION = 4
+
+# ID verification columns added to public_image_submissions by this
+# migration (identifiers cannot be bound as parameters in DDL, so the
+# statements are assembled from this constant once, not per iteration)
+_NEW_PUBLIC_COLUMNS = [
+    ('id_type', 'VARCHAR(50)'),
+    ('id_front_filename', 'VARCHAR(255)'),
+    ('id_back_filename', 'VARCHAR(255)'),
+    ('live_photo_filename', 'VARCHAR(255)'),
+    ('verification_status', 'VARCHAR(20) DEFAULT "pending"'),
+    ('verification_notes', 'TEXT'),
+    ('submitted_ip', 'VARCHAR(45)'),
+    ('user_agent', 'TEXT')
+]
+
+# Query-path indexes on water_level_submissions; mirrored in the model's
+# __table_args__ so fresh databases get them from create_all
+_SUBMISSION_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS ix_sub_sync_status '
+    'ON water_level_submissions (sync_status)',
+    'CREATE INDEX IF NOT EXISTS ix_sub_timestamp '
+    'ON water_level_submissions (timestamp)',
+    'CREATE INDEX IF NOT EXISTS ix_sub_user_site_time '
+    'ON water_level_submissions (user_id, site_id, timestamp DESC)',
+]
+
+def _create_submission_indexes():
+    """Create the submission query indexes on the current session."""
+    for stmt in _SUBMISSION_INDEXES:
+        db.session.execute(text(stmt))
+
+class _SchemaSnapshot:
+    """
+    One query over sqlite_master plus lazily-memoized column sets,
+    instead of a separate round-trip per existence/column probe.
+    """
+
+    def __init__(self, session):
+        self._session = session
+        rows = session.execute(text(
+            "SELECT name FROM sqlite_master WHERE type='table'"
+        )).fetchall()
+        self.tables = {row[0] for row in rows}
+        self.cols_cache = {}
+
+    def has_table(self, name):
+        return name in self.tables
+
+    def columns(self, name):
+        if name not in self.cols_cache:
+            if name in self.tables:
+                result = self._session.execute(text(f"PRAGMA table_info({name})"))
+                self.cols_cache[name] = {row[1] for row in result}
+            else:
+                self.cols_cache[name] = set()
+        return self.cols_cache[name]
+
+def _enable_wal():
+    """Switch the migration connection to WAL with relaxed sync.
+
+    WAL persists on the database file, so later app runs inherit it; the
+    connect-time pragmas in models.py keep pooled connections consistent.
+    """
+    db.session.execute(text("PRAGMA journal_mode=WAL"))
+    db.session.execute(text("PRAGMA synchronous=NORMAL"))
+    # Session-scoped: keep temp tables and a 64 MB page cache in memory
+    # and mmap the database file, so the bulk copy never spills sort or
+    # temp data to disk and hot index pages stay resident
+    db.session.execute(text("PRAGMA temp_store=MEMORY"))
+    db.session.execute(text("PRAGMA cache_size=-65536"))
+    db.session.execute(text("PRAGMA mmap_size=268435456"))
+
+def migrate_database(app=None):
+    # Reuse the caller's app (and its engine/WAL pragmas) when given;
+    # the __main__ block creates one app for the whole run
+    app = app or create_app()
 
-def migrate_database():
-    app = create_app()
-    
     with app.app_context():
         print("Starting database migration...")
-        
+
         try:
-            # Check if PublicImageSubmission table exists
-            result = db.session.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name='public_image_submissions'"))
-            public_table_exists = result.fetchone() is not None
-            
-            # Check if the columns already exist in water_level_submissions
-            result = db.session.execute(text("PRAGMA table_info(water_level_submissions)"))
-            columns = [row[1] for row in result]
-            
+            _enable_wal()
+
+            # Fast path: one integer read covers the common case of a
+            # production restart against an already-migrated database
+            version = db.session.execute(text("PRAGMA user_version")).scalar()
+            if version >= _SCHEMA_VERSION:
+                print("Database is already up to date!")
+                return
+
+            # Snapshot the schema once instead of issuing a separate
+            # sqlite_master / PRAGMA round-trip per probe
+            schema = _SchemaSnapshot(db.session)
+
+            public_table_exists = schema.has_table('public_image_submissions')
+
+            columns = schema.columns('water_level_submissions')
             qr_columns_exist = 'qr_code_scanned' in columns and 'verification_method' in columns
-            
+
             # Check if new ID verification columns exist in public_image_submissions
             if public_table_exists:
-                result = db.session.execute(text("PRAGMA table_info(public_image_submissions)"))
-                public_columns = [row[1] for row in result]
-                id_columns_exist = all(col in public_columns for col in [
-                    'id_type', 'id_front_filename', 'id_back_filename', 'live_photo_filename',
-                    'verification_status', 'verification_notes', 'submitted_ip', 'user_agent'
-                ])
+                public_columns = schema.columns('public_image_submissions')
+                id_columns_exist = all(name in public_columns for name, _ in _NEW_PUBLIC_COLUMNS)
             else:
                 id_columns_exist = False
 
-            # Check if app_config table exists
-            result = db.session.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name='app_config'"))
-            app_config_exists = result.fetchone() is not None
+            app_config_exists = schema.has_table('app_config')
 
             if public_table_exists and qr_columns_exist and id_columns_exist and app_config_exists:
+                # Only the indexes may be missing at this point
+                _create_submission_indexes()
+                # Stamp the version so the next run takes the fast path
+                db.session.execute(text(f"PRAGMA user_version = {_SCHEMA_VERSION}"))
+                db.session.commit()
                 print("Database is already up to date!")
-                return
-            
+                return schema
+
             print("Starting database migration for new features...")
-            
+
+            # Batch the ADD COLUMN statements for public_image_submissions
+            # into one executescript call - a single dispatch into SQLite's
+            # C loop instead of one round-trip per column. executescript
+            # auto-commits, so it runs before the explicit transaction
+            # below; each ALTER is already guarded by the column probe.
+            if public_table_exists:
+                pending = [
+                    (name, f'ALTER TABLE public_image_submissions ADD COLUMN {name} {col_type}')
+                    for name, col_type in _NEW_PUBLIC_COLUMNS
+                    if name not in public_columns
+                ]
+                if pending:
+                    print("Adding ID verification columns to existing public_image_submissions table...")
+                    for column_name, _ in pending:
+                        print(f"Adding column: {column_name}")
+                    raw = db.engine.raw_connection()
+                    try:
+                        raw.executescript(';\n'.join(stmt for _, stmt in pending) + ';')
+                        raw.commit()
+                    finally:
+                        raw.close()
+
+            # One explicit transaction for the whole schema change: a
+            # single fsync at COMMIT instead of one per statement, and
+            # IMMEDIATE takes the write lock up front so we never hit a
+            # mid-migration lock upgrade.
+            db.session.execute(text("BEGIN IMMEDIATE"))
+
             # Add the missing columns to water_level_submissions table if they don't exist
             if 'verification_method' not in columns:
                 print("Adding verification_method column...")
@@ -100,233 +213,193 @@ def migrate_database():
                         FOREIGN KEY (reviewed_by) REFERENCES users (id)
                     )
                 '''))
-            else:
-                # Add new ID verification columns to existing table
-                print("Adding ID verification columns to existing public_image_submissions table...")
-                
-                new_columns = [
-                    ('id_type', 'VARCHAR(50)'),
-                    ('id_front_filename', 'VARCHAR(255)'),
-                    ('id_back_filename', 'VARCHAR(255)'),
-                    ('live_photo_filename', 'VARCHAR(255)'),
-                    ('verification_status', 'VARCHAR(20) DEFAULT "pending"'),
-                    ('verification_notes', 'TEXT'),
-                    ('submitted_ip', 'VARCHAR(45)'),
-                    ('user_agent', 'TEXT')
-                ]
-                
-                for column_name, column_type in new_columns:
-                    if column_name not in public_columns:
-                        print(f"Adding column: {column_name}")
-                        db.session.execute(text(f'''
-                            ALTER TABLE public_image_submissions 
-                            ADD COLUMN {column_name} {column_type}
-                        '''))
+            # (missing ID verification columns were added above, before
+            # the transaction, via executescript)
             
-            # Create AppConfig table if it doesn't exist
+            # Create AppConfig table if it doesn't exist (on this same
+            # session so it joins the open transaction)
             if not app_config_exists:
-                add_app_config_table()
-            
+                _create_app_config_table()
+
+            _create_submission_indexes()
+
+            db.session.execute(text(f"PRAGMA user_version = {_SCHEMA_VERSION}"))
             db.session.commit()
             print("Database migration completed successfully!")
+
+            # Refresh the snapshot entries this run touched so the
+            # verification step can reuse it instead of re-probing;
+            # popped column sets are re-read lazily on first access
+            schema.tables.update(('sync_logs', 'public_image_submissions', 'app_config'))
+            schema.cols_cache.pop('public_image_submissions', None)
+            schema.cols_cache.pop('water_level_submissions', None)
+            return schema
             
         except Exception as e:
             db.session.rollback()
             print(f"Migration failed: {e}")
             print("Trying alternative migration approach...")
-            try_alternative_migration()
+            try_alternative_migration(app)
+
+# Tables whose schema this migration changes; the fallback rewrites
+# only these, leaving every other table untouched on disk
+_REWRITE_TABLES = ['water_level_submissions', 'public_image_submissions']
+
+# SQL literals used to backfill columns the old schema may lack (or hold
+# NULL for); applied as COALESCE(col, literal) in the copy SELECT
+_RESTORE_DEFAULTS = {
+    'water_level_submissions': {
+        'verification_method': "'gps'",
+        'tamper_score': '0.0',
+        'tamper_status': "'clean'",
+        'tamper_check_version': "'1.0'"
+    },
+    'public_image_submissions': {
+        'status': "'pending'",
+        'verification_status': "'pending'"
+    }
+}
+
+def _copy_table(session, table, source, defaults_key=None):
+    """
+    INSERT INTO table SELECT ... FROM source, with COALESCE backfill
+    for columns the source lacks. Rows never leave SQLite's C layer and
+    ids are copied verbatim, so foreign keys stay valid without any
+    Python-side remapping. defaults_key overrides the _RESTORE_DEFAULTS
+    lookup when the destination is a scratch-named copy of a model table.
+    """
+    new_cols = [row[1] for row in session.execute(text(f"PRAGMA table_info({table})"))]
+    old_cols = {row[1] for row in session.execute(text(f"PRAGMA table_info({source})"))}
+    defaults = _RESTORE_DEFAULTS.get(defaults_key or table, {})
+
+    dest = []
+    src = []
+    for col in new_cols:
+        default = defaults.get(col)
+        if col in old_cols:
+            dest.append(col)
+            src.append(f"COALESCE({col}, {default})" if default else col)
+        elif default:
+            # Column added by this migration: fill with the default
+            dest.append(col)
+            src.append(default)
+
+    session.execute(text(
+        f"INSERT INTO {table} ({', '.join(dest)}) "
+        f"SELECT {', '.join(src)} FROM {source}"
+    ))
+    return session.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+
+def try_alternative_migration(app=None):
+    """Alternative migration: rewrite only the schema-changing tables"""
+    app = app or create_app()
 
-def try_alternative_migration():
-    """Alternative migration using backup and restore"""
-    app = create_app()
-    
     with app.app_context():
         try:
-            print("Creating database backup and recreating with new schema...")
-            
-            # Import all models
-            from models import User, MonitoringSite, UserSite, WaterLevelSubmission, SyncLog, PublicImageSubmission
-            
-            # Backup data
-            users = User.query.all()
-            sites = MonitoringSite.query.all()
-            user_sites = UserSite.query.all()
-            submissions = WaterLevelSubmission.query.all()
-            public_submissions = PublicImageSubmission.query.all()
-            sync_logs = SyncLog.query.all()
-            
-            print(f"Backing up: {len(users)} users, {len(sites)} sites, {len(submissions)} submissions, {len(public_submissions)} public submissions")
-            
-            # Create new database with updated schema
-            print("Recreating database with new schema including ID verification...")
-            db.drop_all()
-            db.create_all()
-            
-            # Restore users
-            user_mapping = {}
-            for user in users:
-                new_user = User(
-                    username=user.username,
-                    password_hash=user.password_hash,
-                    role=user.role,
-                    full_name=user.full_name,
-                    email=user.email,
-                    phone=user.phone,
-                    is_active=user.is_active,
-                    created_at=user.created_at,
-                    last_login=user.last_login
-                )
-                db.session.add(new_user)
-                db.session.flush()  # Get the new ID
-                user_mapping[user.id] = new_user.id
-            
-            db.session.commit()
-            
-            # Restore sites
-            site_mapping = {}
-            for site in sites:
-                new_site = MonitoringSite(
-                    name=site.name,
-                    latitude=site.latitude,
-                    longitude=site.longitude,
-                    qr_code=site.qr_code,
-                    description=site.description,
-                    river_basin=site.river_basin,
-                    district=site.district,
-                    state=site.state,
-                    is_active=site.is_active,
-                    created_by=user_mapping.get(site.created_by),
-                    created_at=site.created_at
-                )
-                db.session.add(new_site)
-                db.session.flush()  # Get the new ID
-                site_mapping[site.id] = new_site.id
-            
-            db.session.commit()
-            
-            # Restore user sites
-            for user_site in user_sites:
-                new_user_site = UserSite(
-                    user_id=user_mapping.get(user_site.user_id),
-                    site_id=site_mapping[user_site.site_id],
-                    assigned_at=user_site.assigned_at,
-                    assigned_by=user_mapping.get(user_site.assigned_by)
-                )
-                db.session.add(new_user_site)
-            
-            # Restore submissions with new fields
-            for submission in submissions:
-                new_submission = WaterLevelSubmission(
-                    user_id=user_mapping.get(submission.user_id),
-                    site_id=site_mapping[submission.site_id],
-                    water_level=submission.water_level,
-                    timestamp=submission.timestamp,
-                    gps_latitude=submission.gps_latitude,
-                    gps_longitude=submission.gps_longitude,
-                    photo_filename=submission.photo_filename,
-                    location_verified=submission.location_verified,
-                    verification_method=getattr(submission, 'verification_method', 'gps'),
-                    qr_code_scanned=getattr(submission, 'qr_code_scanned', None),
-                    sync_status=submission.sync_status,
-                    sync_attempts=submission.sync_attempts,
-                    last_sync_attempt=submission.last_sync_attempt,
-                    sync_error=submission.sync_error,
-                    notes=submission.notes,
-                    quality_rating=submission.quality_rating,
-                    reviewed_by=user_mapping.get(submission.reviewed_by) if submission.reviewed_by else None,
-                    reviewed_at=submission.reviewed_at,
-                    review_notes=submission.review_notes,
-                    created_at=submission.created_at,
-                    tamper_score=getattr(submission, 'tamper_score', 0.0),
-                    tamper_status=getattr(submission, 'tamper_status', 'clean'),
-                    last_tamper_check=getattr(submission, 'last_tamper_check', None),
-                    tamper_check_version=getattr(submission, 'tamper_check_version', '1.0')
-                )
-                db.session.add(new_submission)
-            
-            # Restore public submissions with new ID verification fields
-            for public_sub in public_submissions:
-                new_public_sub = PublicImageSubmission(
-                    site_id=site_mapping[public_sub.site_id],
-                    photo_filename=public_sub.photo_filename,
-                    timestamp=public_sub.timestamp,
-                    gps_latitude=public_sub.gps_latitude,
-                    gps_longitude=public_sub.gps_longitude,
-                    contact_email=public_sub.contact_email,
-                    description=public_sub.description,
-                    status=public_sub.status,
-                    reviewed_by=user_mapping.get(public_sub.reviewed_by) if public_sub.reviewed_by else None,
-                    reviewed_at=public_sub.reviewed_at,
-                    review_notes=public_sub.review_notes,
-                    # New ID verification fields with default values
-                    id_type=getattr(public_sub, 'id_type', None),
-                    id_front_filename=getattr(public_sub, 'id_front_filename', None),
-                    id_back_filename=getattr(public_sub, 'id_back_filename', None),
-                    live_photo_filename=getattr(public_sub, 'live_photo_filename', None),
-                    verification_status=getattr(public_sub, 'verification_status', 'pending'),
-                    verification_notes=getattr(public_sub, 'verification_notes', None),
-                    submitted_ip=getattr(public_sub, 'submitted_ip', None),
-                    user_agent=getattr(public_sub, 'user_agent', None)
-                )
-                db.session.add(new_public_sub)
-            
-            # Restore sync logs
-            for sync_log in sync_logs:
-                new_sync_log = SyncLog(
-                    timestamp=sync_log.timestamp,
-                    sync_type=sync_log.sync_type,
-                    submissions_synced=sync_log.submissions_synced,
-                    submissions_failed=sync_log.submissions_failed,
-                    total_attempts=sync_log.total_attempts,
-                    sync_duration=sync_log.sync_duration,
-                    error_message=sync_log.error_message,
-                    success=sync_log.success
-                )
-                db.session.add(new_sync_log)
-            
-            # Create AppConfig table
-            add_app_config_table()
-            
+            _enable_wal()
+            print("Rewriting changed tables with the new schema...")
+
+            existing = {row[0] for row in db.session.execute(text(
+                "SELECT name FROM sqlite_master WHERE type='table'"
+            )).fetchall()}
+
+            # Scratch metadata holding a copy of every model table, so
+            # the _new_-named copies below can resolve their foreign-key
+            # targets (users, monitoring_sites) when the DDL compiles
+            scratch_metadata = MetaData()
+            for t in db.metadata.sorted_tables:
+                t.to_metadata(scratch_metadata)
+
+            # foreign_keys only toggles outside a transaction; re-enabled
+            # after the commit below
+            db.session.execute(text("PRAGMA foreign_keys=OFF"))
+            db.session.execute(text("BEGIN IMMEDIATE"))
+
+            for table in _REWRITE_TABLES:
+                model_table = db.metadata.tables[table]
+                if table in existing:
+                    # SQLite's canonical table rewrite, in this exact
+                    # order: build the replacement under a scratch name,
+                    # bulk-copy the rows, drop the old table, rename the
+                    # copy into place. Renaming the populated table aside
+                    # first would make SQLite (3.25+) rewrite the
+                    # foreign-key clauses in tamper_detections and
+                    # river_analyses to follow it to _old_{table}, which
+                    # the next statement drops; nothing references the
+                    # scratch name, so this rename rewrites nothing
+                    new_table = model_table.to_metadata(
+                        scratch_metadata, name=f'_new_{table}'
+                    )
+                    db.session.execute(CreateTable(new_table))
+                    copied = _copy_table(
+                        db.session, f'_new_{table}', table, defaults_key=table
+                    )
+                    db.session.execute(text(f'DROP TABLE {table}'))
+                    db.session.execute(text(f'ALTER TABLE _new_{table} RENAME TO {table}'))
+                    print(f"  Rewrote {table} ({copied} rows)")
+                else:
+                    db.session.execute(CreateTable(model_table))
+                    print(f"  Created {table}")
+                # Secondary indexes go on after the copy, so the bulk
+                # insert pays no per-row index maintenance
+                for index in model_table.indexes:
+                    db.session.execute(CreateIndex(index))
+
+            # Create any other model tables that are missing entirely
+            # (e.g. sync_logs on very old databases)
+            for model_table in db.metadata.sorted_tables:
+                if model_table.name not in existing and model_table.name not in _REWRITE_TABLES:
+                    db.session.execute(CreateTable(model_table))
+
+            # Create AppConfig table on this session
+            _create_app_config_table()
+
+            db.session.execute(text(f"PRAGMA user_version = {_SCHEMA_VERSION}"))
             db.session.commit()
-            print("Database migration completed successfully with backup/restore!")
-            
+            db.session.execute(text("PRAGMA foreign_keys=ON"))
+            print("Database migration completed successfully with table rewrite!")
+
         except Exception as e:
             db.session.rollback()
             print(f"Alternative migration also failed: {e}")
             print("Please use the reinitialization method instead.")
 
-def add_app_config_table():
+def _create_app_config_table():
+    """Create and seed app_config on the current session (no commit)."""
+    db.session.execute(text('''
+        CREATE TABLE IF NOT EXISTS app_config (
+            id INTEGER PRIMARY KEY,
+            key VARCHAR(100) UNIQUE NOT NULL,
+            value TEXT,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    '''))
+
+    # Insert default configuration values
+    default_configs = [
+        ('id_verification_required', 'true'),
+        ('public_submissions_enabled', 'true'),
+        ('max_file_size_mb', '10'),
+        ('allowed_file_types', 'jpg,jpeg,png,pdf'),
+        ('auto_verification_threshold', '0.8'),
+        ('maintenance_mode', 'false')
+    ]
+
+    # Passing the whole list binds the statement once and iterates in
+    # C (executemany) instead of dispatching one INSERT per row
+    db.session.execute(
+        text('INSERT OR IGNORE INTO app_config (key, value) VALUES (:key, :value)'),
+        [{'key': key, 'value': value} for key, value in default_configs]
+    )
+
+def add_app_config_table(app=None):
     """Create AppConfig table for storing application configuration"""
-    app = create_app()
-    
+    app = app or create_app()
+
     with app.app_context():
         try:
-            # Create AppConfig table
-            db.session.execute(text('''
-                CREATE TABLE IF NOT EXISTS app_config (
-                    id INTEGER PRIMARY KEY,
-                    key VARCHAR(100) UNIQUE NOT NULL,
-                    value TEXT,
-                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            '''))
-            
-            # Insert default configuration values
-            default_configs = [
-                ('id_verification_required', 'true'),
-                ('public_submissions_enabled', 'true'),
-                ('max_file_size_mb', '10'),
-                ('allowed_file_types', 'jpg,jpeg,png,pdf'),
-                ('auto_verification_threshold', '0.8'),
-                ('maintenance_mode', 'false')
-            ]
-            
-            for key, value in default_configs:
-                db.session.execute(
-                    text('INSERT OR IGNORE INTO app_config (key, value) VALUES (:key, :value)'),
-                    {'key': key, 'value': value}
-                )
-            
+            _enable_wal()
+            _create_app_config_table()
             db.session.commit()
             print("✓ AppConfig table created and populated with default values")
             
@@ -334,12 +407,14 @@ def add_app_config_table():
             db.session.rollback()
             print(f"Error creating AppConfig table: {e}")
 
-def add_sample_public_submissions():
+def add_sample_public_submissions(app=None):
     """Add sample public submissions for testing with ID verification"""
-    app = create_app()
-    
+    app = app or create_app()
+
     with app.app_context():
         try:
+            _enable_wal()
+
             from models import PublicImageSubmission, MonitoringSite
             from datetime import datetime, timedelta
             
@@ -349,15 +424,20 @@ def add_sample_public_submissions():
             if not sites:
                 print("No active sites found. Please run init_db.py first.")
                 return
+
+            # Hoist the ORM attribute reads into plain tuples once, so
+            # the row-building loop below touches no descriptors
+            site_info = [(s.id, s.latitude, s.longitude, s.name) for s in sites]
             
-            # Clear existing public submissions
-            PublicImageSubmission.query.delete()
+            # Clear existing public submissions (plain SQL, no session
+            # bookkeeping)
+            db.session.execute(text('DELETE FROM public_image_submissions'))
             
             # Create sample public submissions with ID verification data
             sample_data = [
                 {
                     'days_ago': 1,
-                    'site': sites[0],
+                    'site': site_info[0],
                     'description': 'Water level looks normal today',
                     'contact_email': 'citizen1@example.com',
                     'has_gps': True,
@@ -366,7 +446,7 @@ def add_sample_public_submissions():
                 },
                 {
                     'days_ago': 2,
-                    'site': sites[1],
+                    'site': site_info[1],
                     'description': 'Heavy rainfall yesterday, water level seems higher',
                     'contact_email': 'local.observer@example.com',
                     'has_gps': False,
@@ -375,7 +455,7 @@ def add_sample_public_submissions():
                 },
                 {
                     'days_ago': 3,
-                    'site': sites[2],
+                    'site': site_info[2],
                     'description': 'Regular monitoring photo',
                     'contact_email': None,
                     'has_gps': True,
@@ -384,7 +464,7 @@ def add_sample_public_submissions():
                 },
                 {
                     'days_ago': 4,
-                    'site': sites[0],
+                    'site': site_info[0],
                     'description': 'Dry season, water level is low',
                     'contact_email': 'river.watcher@example.com',
                     'has_gps': True,
@@ -393,7 +473,7 @@ def add_sample_public_submissions():
                 },
                 {
                     'days_ago': 5,
-                    'site': sites[3],
+                    'site': site_info[3],
                     'description': 'Weekly checkup photo',
                     'contact_email': 'community.helper@example.com',
                     'has_gps': False,
@@ -402,7 +482,7 @@ def add_sample_public_submissions():
                 },
                 {
                     'days_ago': 6,
-                    'site': sites[1],
+                    'site': site_info[1],
                     'description': 'Testing without ID verification',
                     'contact_email': 'test@example.com',
                     'has_gps': True,
@@ -411,30 +491,37 @@ def add_sample_public_submissions():
                 }
             ]
             
+            # Build plain dicts and insert them in one multi-row statement,
+            # skipping ORM instantiation and identity-map registration
+            now = datetime.utcnow()
+            rows = []
             for i, data in enumerate(sample_data):
-                submission = PublicImageSubmission(
-                    site_id=data['site'].id,
-                    photo_filename=f"public_water_{data['site'].id}_{i+1}.jpg",
-                    timestamp=datetime.utcnow() - timedelta(days=data['days_ago']),
-                    gps_latitude=data['site'].latitude + 0.0001 if data['has_gps'] else None,
-                    gps_longitude=data['site'].longitude + 0.0001 if data['has_gps'] else None,
-                    contact_email=data['contact_email'],
-                    description=data['description'],
-                    status='pending',
+                site_id, site_lat, site_lon, _ = data['site']
+                rows.append({
+                    'site_id': site_id,
+                    'photo_filename': f"public_water_{site_id}_{i+1}.jpg",
+                    'timestamp': now - timedelta(days=data['days_ago']),
+                    'gps_latitude': site_lat + 0.0001 if data['has_gps'] else None,
+                    'gps_longitude': site_lon + 0.0001 if data['has_gps'] else None,
+                    'contact_email': data['contact_email'],
+                    'description': data['description'],
+                    'status': 'pending',
                     # ID verification fields
-                    id_type=data['id_type'],
-                    id_front_filename=f"public_id_front_{data['site'].id}_{i+1}.jpg" if data['has_id_verification'] else None,
-                    id_back_filename=f"public_id_back_{data['site'].id}_{i+1}.jpg" if data['has_id_verification'] and i % 2 == 0 else None,  # Only some have back side
-                    live_photo_filename=f"public_live_{data['site'].id}_{i+1}.jpg" if data['has_id_verification'] else None,
-                    verification_status='verified' if data['has_id_verification'] and i < 3 else 'pending',  # First 3 are verified
-                    verification_notes='Automatically verified for testing' if data['has_id_verification'] and i < 3 else None,
-                    submitted_ip='192.168.1.100',
-                    user_agent='Mozilla/5.0 (Test Browser)'
-                )
-                db.session.add(submission)
+                    'id_type': data['id_type'],
+                    'id_front_filename': f"public_id_front_{site_id}_{i+1}.jpg" if data['has_id_verification'] else None,
+                    'id_back_filename': f"public_id_back_{site_id}_{i+1}.jpg" if data['has_id_verification'] and i % 2 == 0 else None,  # Only some have back side
+                    'live_photo_filename': f"public_live_{site_id}_{i+1}.jpg" if data['has_id_verification'] else None,
+                    'verification_status': 'verified' if data['has_id_verification'] and i < 3 else 'pending',  # First 3 are verified
+                    'verification_notes': 'Automatically verified for testing' if data['has_id_verification'] and i < 3 else None,
+                    'submitted_ip': '192.168.1.100',
+                    'user_agent': 'Mozilla/5.0 (Test Browser)'
+                })
+            db.session.bulk_insert_mappings(PublicImageSubmission, rows)
+
+            for data in sample_data:
                 status_info = "with ID verification" if data['has_id_verification'] else "without ID verification"
-                print(f"✓ Created sample public submission for {data['site'].name} {status_info}")
-            
+                print(f"✓ Created sample public submission for {data['site'][3]} {status_info}")
+
             db.session.commit()
             print("✓ Sample public submissions with ID verification added successfully!")
             
@@ -442,24 +529,21 @@ def add_sample_public_submissions():
             db.session.rollback()
             print(f"Error adding sample public submissions: {e}")
 
-def verify_migration():
+def verify_migration(app=None, schema=None):
     """Verify that the migration was successful"""
-    app = create_app()
-    
+    app = app or create_app()
+
     with app.app_context():
         try:
             print("\nVerifying migration...")
-            
-            # Check public_image_submissions table structure
-            result = db.session.execute(text("PRAGMA table_info(public_image_submissions)"))
-            columns = [row[1] for row in result]
-            
-            required_columns = [
-                'id_type', 'id_front_filename', 'id_back_filename', 'live_photo_filename',
-                'verification_status', 'verification_notes', 'submitted_ip', 'user_agent'
-            ]
-            
-            missing_columns = [col for col in required_columns if col not in columns]
+
+            # Reuse the migration's schema snapshot when it was handed
+            # over; only fall back to live probes without one
+            if schema is None:
+                schema = _SchemaSnapshot(db.session)
+            columns = schema.columns('public_image_submissions')
+
+            missing_columns = [name for name, _ in _NEW_PUBLIC_COLUMNS if name not in columns]
             
             if missing_columns:
                 print(f"❌ Missing columns: {missing_columns}")
@@ -473,9 +557,8 @@ def verify_migration():
             print(f"✅ Public submissions table is accessible ({count} records)")
             
             # Check AppConfig table
-            result = db.session.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name='app_config'"))
-            app_config_exists = result.fetchone() is not None
-            
+            app_config_exists = schema.has_table('app_config')
+
             if app_config_exists:
                 print("✅ AppConfig table exists")
                 
@@ -509,14 +592,17 @@ def verify_migration():
             return False
 
 if __name__ == '__main__':
-    migrate_database()
-    
-    # Verify migration
-    if verify_migration():
+    # One app (engine, config, metadata) shared by every phase
+    app = create_app()
+
+    schema = migrate_database(app)
+
+    # Verify migration, reusing the migration's schema snapshot
+    if verify_migration(app, schema):
         # Ask if user wants to add sample public submissions
         add_samples = input("\nDo you want to add sample public submissions with ID verification? (y/n): ").lower().strip()
         if add_samples in ['y', 'yes']:
-            add_sample_public_submissions()
+            add_sample_public_submissions(app)
             print("✓ Sample public submissions with ID verification added!")
     else:
         print("\n❌ Migration failed. Please check the error messages above.")
@@ -2,11 +2,33 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
 import json
+import sqlite3
 from functools import wraps
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from werkzeug.security import generate_password_hash
 
 db = SQLAlchemy()
 
+
+@event.listens_for(Engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Put every pooled SQLite connection into WAL mode with relaxed sync.
+
+    WAL appends sequentially instead of rewriting a rollback journal per
+    transaction, and synchronous=NORMAL skips the per-commit fsync that
+    is redundant under WAL. busy_timeout lets concurrent writers queue
+    briefly instead of failing with 'database is locked'.
+    """
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
 # Role-based permissions
 ROLE_PERMISSIONS = {
     'field_agent': {
@@ -345,6 +367,14 @@ class WaterLevelSubmission(db.Model):
     last_tamper_check = db.Column(db.DateTime)
     tamper_check_version = db.Column(db.String(20), default='1.0')
 
+    # Indexes backing the sync-status scan, date-range filters, and the
+    # per-user/site history lookups in tamper detection
+    __table_args__ = (
+        db.Index('ix_sub_sync_status', sync_status),
+        db.Index('ix_sub_timestamp', timestamp),
+        db.Index('ix_sub_user_site_time', user_id, site_id, timestamp.desc()),
+    )
+
     # Relationships
     submission_user = db.relationship('User', foreign_keys=[user_id], lazy=True)
     submission_site = db.relationship('MonitoringSite', foreign_keys=[site_id], lazy=True)
@@ -1,61 +1,83 @@
 from app import create_app
-from models import db, User, MonitoringSite, UserSite
+from models import db, MonitoringSite
+from sqlalchemy import text
 from werkzeug.security import generate_password_hash
+import os
+
+def _seed_password_hash(password):
+    """Hash a seed password; SEED_FAST=1 drops PBKDF2 to 10k rounds.
+
+    Werkzeug's default iteration count costs ~100 ms of CPU per hash,
+    which dominates repeated seed runs in CI. Production code paths are
+    unaffected - this helper is only used for fixture accounts.
+    """
+    if os.environ.get('SEED_FAST') == '1':
+        return generate_password_hash(password, method='pbkdf2:sha256:10000')
+    return generate_password_hash(password)
 
 def setup_musi_agent():
     app = create_app()
     with app.app_context():
         print("--- Setting up Musi River Field Agent ---")
         
-        # 1. Get or Create User
-        user = User.query.filter_by(username='field_agent').first()
-        if not user:
-            print("Creating new field_agent user...")
-            user = User(username='field_agent')
-        else:
-            print("Updating existing field_agent user...")
-            
-        user.password_hash = generate_password_hash('password123')
-        user.role = 'field_agent'
-        user.full_name = 'Musi Field Agent'
-        user.email = 'field.musi@jalscan.com'
-        user.phone = '+91-9876543210'
-        user.is_active = True
-        user.assigned_river = 'MUSI_HYDERABAD_001'
-        user.agent_id = '001'
-        
-        db.session.add(user)
+        # 1. Create or update the user in one round-trip: SQLite's upsert
+        # replaces the query-then-branch-then-commit dance, and RETURNING
+        # hands back the id without a follow-up SELECT
+        row = db.session.execute(text('''
+            INSERT INTO users (username, password_hash, role, full_name, email,
+                               phone, is_active, assigned_river, agent_id, created_at)
+            VALUES (:username, :password_hash, 'field_agent', 'Musi Field Agent',
+                    'field.musi@jalscan.com', '+91-9876543210', 1,
+                    'MUSI_HYDERABAD_001', '001', CURRENT_TIMESTAMP)
+            ON CONFLICT(username) DO UPDATE SET
+                password_hash = excluded.password_hash,
+                role = excluded.role,
+                full_name = excluded.full_name,
+                email = excluded.email,
+                phone = excluded.phone,
+                is_active = 1,
+                assigned_river = excluded.assigned_river,
+                agent_id = excluded.agent_id
+            RETURNING id
+        '''), {
+            'username': 'field_agent',
+            'password_hash': _seed_password_hash('password123')
+        }).fetchone()
+        user_id = row[0]
         db.session.commit()
-        print(f"User '{user.username}' saved.")
-        
-        # 2. Get Musi River Site
-        site = MonitoringSite.query.filter(MonitoringSite.name.like('%Musi%')).first()
+        print("User 'field_agent' saved.")
+
+        # 2. Get Musi River Site by its unique (indexed) QR code - a
+        # leading-wildcard LIKE on name cannot use any index
+        site = MonitoringSite.query.filter_by(qr_code='MUSI_HYDERABAD_001').first()
         if not site:
             print("Error: Musi River site not found!")
             return
-            
+
         print(f"Found Site: {site.name} (ID: {site.id})")
-        
+
         # 3. Assign User to Site (Explicit Assignment)
-        # Check if already assigned
-        assignment = UserSite.query.filter_by(user_id=user.id, site_id=site.id).first()
-        if not assignment:
-            print("Assigning user to site...")
-            assignment = UserSite(
-                user_id=user.id,
-                site_id=site.id,
-                assigned_by=1  # Assuming admin is ID 1
+        # user_sites has no unique constraint to hang an ON CONFLICT on,
+        # so a guarded INSERT ... SELECT does the exists-check and the
+        # insert in a single statement
+        result = db.session.execute(text('''
+            INSERT INTO user_sites (user_id, site_id, assigned_at, assigned_by)
+            SELECT :user_id, :site_id, CURRENT_TIMESTAMP, 1
+            WHERE NOT EXISTS (
+                SELECT 1 FROM user_sites
+                WHERE user_id = :user_id AND site_id = :site_id
             )
-            db.session.add(assignment)
-            db.session.commit()
+        '''), {'user_id': user_id, 'site_id': site.id})
+        db.session.commit()
+        if result.rowcount:
             print("Assignment created.")
         else:
             print("User already assigned to this site.")
-            
+
         print("\n✅ Setup Complete!")
-        print(f"Username: {user.username}")
+        print("Username: field_agent")
         print("Password: password123")
-        print(f"Assigned River: {user.assigned_river}")
+        print("Assigned River: MUSI_HYDERABAD_001")
 
 if __name__ == "__main__":
     setup_musi_agent()
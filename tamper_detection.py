@@ -1,10 +1,14 @@
 # tamper_detection.py
 import logging
 from datetime import datetime, timedelta
+from flask import has_app_context
 from models import db, WaterLevelSubmission, TamperDetection, User
-from utils.geofence import calculate_distance
+from utils.geofence import calculate_distance, calculate_distance_batch
 
-from sqlalchemy import func
+import numpy as np
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import joinedload
 
 class TamperDetectionEngine:
     def __init__(self, app):
@@ -16,56 +20,77 @@ class TamperDetectionEngine:
             'pattern_anomaly': self.detect_pattern_anomaly,
             'quality_anomaly': self.detect_quality_anomaly
         }
+        # id -> precomputed site distance, populated by run_batch_analysis
+        self._batch_distances = None
+        # id -> {'recent_1h', 'duplicates'}, populated by run_batch_analysis
+        self._batch_stats = None
+        # user_id -> (recent_count, recent_avg), populated by run_batch_analysis
+        self._batch_user_stats = None
     
     def analyze_submission(self, submission):
-        """Run all tamper detection rules on a submission"""
+        """Run all tamper detection rules on a submission.
+
+        Callers provide the app context (request handlers already have
+        one); pushing a fresh context here cost a push/pop per call.
+        """
+        assert has_app_context(), "analyze_submission requires an app context"
+
+        detections = self._run_rules(submission)
+        score, status = self._score_detections(detections)
+
+        submission.tamper_score = score
+        submission.tamper_status = status
+        submission.last_tamper_check = datetime.utcnow()
+        db.session.commit()
+
+        # Create tamper detection records
+        for detection in detections:
+            tamper_detection = TamperDetection(
+                submission_id=submission.id,
+                detection_type=detection['type'],
+                severity=detection['severity'],
+                description=detection['description'],
+                confidence_score=detection['confidence_score']
+            )
+            db.session.add(tamper_detection)
+
+        db.session.commit()
+
+        return detections
+
+    def _run_rules(self, submission):
+        """Run the detection rules on a submission without touching the DB"""
         detections = []
-        
-        with self.app.app_context():
-            for rule_name, rule_func in self.detection_rules.items():
-                try:
-                    detection = rule_func(submission)
-                    if detection:
-                        detections.append(detection)
-                except Exception as e:
-                    logging.error(f"Error in tamper detection rule {rule_name}: {e}")
-            
-            # Update submission tamper score
-            if detections:
-                max_severity = max(detections, key=lambda x: self._severity_to_score(x['severity']))
-                submission.tamper_score = max(detection['confidence_score'] for detection in detections)
-                submission.tamper_status = 'suspicious' if submission.tamper_score > 0.5 else 'clean'
-            else:
-                submission.tamper_score = 0.0
-                submission.tamper_status = 'clean'
-            
-            submission.last_tamper_check = datetime.utcnow()
-            db.session.commit()
-            
-            # Create tamper detection records
-            for detection in detections:
-                tamper_detection = TamperDetection(
-                    submission_id=submission.id,
-                    detection_type=detection['type'],
-                    severity=detection['severity'],
-                    description=detection['description'],
-                    confidence_score=detection['confidence_score']
-                )
-                db.session.add(tamper_detection)
-            
-            db.session.commit()
-        
+        for rule_name, rule_func in self.detection_rules.items():
+            try:
+                detection = rule_func(submission)
+                if detection:
+                    detections.append(detection)
+            except Exception as e:
+                logging.error("Error in tamper detection rule %s: %s", rule_name, e)
         return detections
+
+    def _score_detections(self, detections):
+        """Derive the tamper score and status from a set of detections"""
+        if detections:
+            score = max(detection['confidence_score'] for detection in detections)
+            status = 'suspicious' if score > 0.5 else 'clean'
+        else:
+            score, status = 0.0, 'clean'
+        return score, status
     
     def detect_location_mismatch(self, submission):
         """Detect if submission location doesn't match site location"""
         if not submission.site:
             return None
-        
-        distance = calculate_distance(
-            submission.gps_latitude, submission.gps_longitude,
-            submission.site.latitude, submission.site.longitude
-        )
+
+        # Batch runs precompute all distances in one vectorized pass
+        distance = self._batch_distances.get(submission.id) if self._batch_distances else None
+        if distance is None:
+            distance = calculate_distance(
+                submission.gps_latitude, submission.gps_longitude,
+                submission.site.latitude, submission.site.longitude
+            )
         
         # Critical if > 1km from site
         if distance > 1000:
@@ -96,13 +121,18 @@ class TamperDetectionEngine:
     
     def detect_time_anomaly(self, submission):
         """Detect unusual timing patterns"""
-        # Check for submissions in quick succession
-        recent_submissions = WaterLevelSubmission.query.filter(
-            WaterLevelSubmission.user_id == submission.user_id,
-            WaterLevelSubmission.site_id == submission.site_id,
-            WaterLevelSubmission.timestamp > submission.timestamp - timedelta(hours=1),
-            WaterLevelSubmission.id != submission.id
-        ).count()
+        # Check for submissions in quick succession; batch runs have the
+        # counts precomputed (a missing id means no neighbouring rows)
+        if self._batch_stats is not None:
+            stats = self._batch_stats.get(submission.id)
+            recent_submissions = stats['recent_1h'] if stats else 0
+        else:
+            recent_submissions = WaterLevelSubmission.query.filter(
+                WaterLevelSubmission.user_id == submission.user_id,
+                WaterLevelSubmission.site_id == submission.site_id,
+                WaterLevelSubmission.timestamp > submission.timestamp - timedelta(hours=1),
+                WaterLevelSubmission.id != submission.id
+            ).count()
         
         if recent_submissions > 2:
             return {
@@ -126,14 +156,19 @@ class TamperDetectionEngine:
     
     def detect_duplicate_submission(self, submission):
         """Detect potential duplicate submissions"""
-        # Check for similar submissions from same user at same location within short time
-        similar_submissions = WaterLevelSubmission.query.filter(
-            WaterLevelSubmission.user_id == submission.user_id,
-            WaterLevelSubmission.site_id == submission.site_id,
-            WaterLevelSubmission.timestamp > submission.timestamp - timedelta(minutes=30),
-            WaterLevelSubmission.id != submission.id,
-            func.abs(WaterLevelSubmission.water_level - submission.water_level) < 0.1  # Similar water level
-        ).first()
+        # Check for similar submissions from same user at same location
+        # within short time; batch runs use the precomputed counts
+        if self._batch_stats is not None:
+            stats = self._batch_stats.get(submission.id)
+            similar_submissions = stats['duplicates'] if stats else 0
+        else:
+            similar_submissions = WaterLevelSubmission.query.filter(
+                WaterLevelSubmission.user_id == submission.user_id,
+                WaterLevelSubmission.site_id == submission.site_id,
+                WaterLevelSubmission.timestamp > submission.timestamp - timedelta(minutes=30),
+                WaterLevelSubmission.id != submission.id,
+                func.abs(WaterLevelSubmission.water_level - submission.water_level) < 0.1  # Similar water level
+            ).first()
         
         if similar_submissions:
             return {
@@ -147,26 +182,35 @@ class TamperDetectionEngine:
     
     def detect_pattern_anomaly(self, submission):
         """Detect anomalies in submission patterns"""
-        user_submissions = WaterLevelSubmission.query.filter_by(
-            user_id=submission.user_id
-        ).order_by(WaterLevelSubmission.timestamp.desc()).limit(10).all()
-        
-        if len(user_submissions) < 3:
-            return None
+        # Batch runs precompute each user's recent average in one
+        # windowed query; the per-user numbers are identical for every
+        # submission of that user, so they are only computed once
+        if self._batch_user_stats is not None:
+            stats = self._batch_user_stats.get(submission.user_id)
+            if stats is None or stats[0] < 3:
+                return None
+            avg_recent = stats[1]
+        else:
+            user_submissions = WaterLevelSubmission.query.filter_by(
+                user_id=submission.user_id
+            ).order_by(WaterLevelSubmission.timestamp.desc()).limit(10).all()
+            
+            if len(user_submissions) < 3:
+                return None
+            
+            recent_levels = [s.water_level for s in user_submissions[:3]]
+            avg_recent = sum(recent_levels) / len(recent_levels)
         
         # Check for sudden changes in water level
-        recent_levels = [s.water_level for s in user_submissions[:3]]
-        if len(recent_levels) >= 2:
-            avg_recent = sum(recent_levels) / len(recent_levels)
-            current_diff = abs(submission.water_level - avg_recent)
-            
-            if current_diff > 2.0:  # More than 2m difference
-                return {
-                    'type': 'pattern_anomaly',
-                    'severity': 'high',
-                    'description': f'Unusual water level change: {current_diff:.1f}m from recent average',
-                    'confidence_score': 0.7
-                }
+        current_diff = abs(submission.water_level - avg_recent)
+        
+        if current_diff > 2.0:  # More than 2m difference
+            return {
+                'type': 'pattern_anomaly',
+                'severity': 'high',
+                'description': f'Unusual water level change: {current_diff:.1f}m from recent average',
+                'confidence_score': 0.7
+            }
         
         return None
     
@@ -204,11 +248,76 @@ class TamperDetectionEngine:
         }
         return severity_scores.get(severity, 0)
     
+    def _precompute_batch_stats(self, cutoff_date):
+        """
+        One grouped self-join replacing the per-submission time-anomaly
+        and duplicate queries in batch runs. The rules' windows extend
+        from one hour (or 30 minutes) before each submission with no
+        upper bound, which SQL frame specs cannot express, so a
+        conditional-count self-join does the job in a single round-trip.
+        """
+        rows = db.session.execute(text('''
+            SELECT a.id,
+                   SUM(CASE WHEN b.timestamp > datetime(a.timestamp, '-3600 seconds')
+                            THEN 1 ELSE 0 END) AS recent_1h,
+                   SUM(CASE WHEN b.timestamp > datetime(a.timestamp, '-1800 seconds')
+                             AND ABS(b.water_level - a.water_level) < 0.1
+                            THEN 1 ELSE 0 END) AS duplicates
+            FROM water_level_submissions a
+            JOIN water_level_submissions b
+              ON b.user_id = a.user_id
+             AND b.site_id = a.site_id
+             AND b.id != a.id
+            WHERE a.timestamp >= :cutoff
+              AND a.tamper_status != 'confirmed_tamper'
+            GROUP BY a.id
+        '''), {'cutoff': cutoff_date}).fetchall()
+
+        return {
+            row[0]: {'recent_1h': row[1] or 0, 'duplicates': row[2] or 0}
+            for row in rows
+        }
+
+    def _precompute_user_stats(self):
+        """
+        One ROW_NUMBER window pass computing each user's recent
+        submission count (capped at 10, matching the old LIMIT) and the
+        average of their latest three water levels, replacing a
+        per-submission ORDER BY ... LIMIT 10 query in batch runs.
+        """
+        rows = db.session.execute(text('''
+            SELECT user_id,
+                   COUNT(*) AS recent_count,
+                   AVG(CASE WHEN rn <= 3 THEN water_level END) AS recent_avg
+            FROM (
+                SELECT user_id, water_level,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY user_id ORDER BY timestamp DESC
+                       ) AS rn
+                FROM water_level_submissions
+            )
+            WHERE rn <= 10
+            GROUP BY user_id
+        ''')).fetchall()
+
+        return {row[0]: (row[1], row[2]) for row in rows}
+
     def run_batch_analysis(self, days=30):
         """Run tamper detection on recent submissions"""
+        # One context for the whole batch, so the analysis also works
+        # from background threads without a per-submission push/pop
+        with self.app.app_context():
+            return self._run_batch_analysis(days)
+
+    def _run_batch_analysis(self, days):
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
-        submissions = WaterLevelSubmission.query.filter(
+        # Eager-load site and user in the same query; the detection
+        # rules touch both, and lazy loading would fire a SELECT per row
+        submissions = WaterLevelSubmission.query.options(
+            joinedload(WaterLevelSubmission.submission_site),
+            joinedload(WaterLevelSubmission.submission_user)
+        ).filter(
             WaterLevelSubmission.timestamp >= cutoff_date,
             WaterLevelSubmission.tamper_status != 'confirmed_tamper'
         ).all()
@@ -219,22 +328,74 @@ class TamperDetectionEngine:
             'detections_by_type': {},
             'detections_by_severity': {}
         }
-        
-        for submission in submissions:
-            detections = self.analyze_submission(submission)
-            
-            if detections:
-                results['suspicious_found'] += 1
-            
-            for detection in detections:
-                # Count by type
-                results['detections_by_type'][detection['type']] = \
-                    results['detections_by_type'].get(detection['type'], 0) + 1
-                
-                # Count by severity
-                results['detections_by_severity'][detection['severity']] = \
-                    results['detections_by_severity'].get(detection['severity'], 0) + 1
-        
+
+        # Compute every site distance in one vectorized haversine pass;
+        # the per-submission location rule then only does a dict lookup
+        with_coords = [
+            s for s in submissions
+            if s.site is not None
+            and s.gps_latitude is not None and s.gps_longitude is not None
+        ]
+        if with_coords:
+            distances = calculate_distance_batch(
+                np.array([s.gps_latitude for s in with_coords]),
+                np.array([s.gps_longitude for s in with_coords]),
+                np.array([s.site.latitude for s in with_coords]),
+                np.array([s.site.longitude for s in with_coords])
+            )
+            self._batch_distances = {
+                s.id: d for s, d in zip(with_coords, distances.tolist())
+            }
+
+        self._batch_stats = self._precompute_batch_stats(cutoff_date)
+        self._batch_user_stats = self._precompute_user_stats()
+
+        # Accumulate everything and flush in one commit instead of the
+        # two commits per submission analyze_submission would make
+        now = datetime.utcnow()
+        tamper_records = []
+        submission_updates = []
+
+        try:
+            for submission in submissions:
+                detections = self._run_rules(submission)
+                score, status = self._score_detections(detections)
+
+                submission_updates.append({
+                    'id': submission.id,
+                    'tamper_score': score,
+                    'tamper_status': status,
+                    'last_tamper_check': now
+                })
+
+                if detections:
+                    results['suspicious_found'] += 1
+
+                for detection in detections:
+                    tamper_records.append({
+                        'submission_id': submission.id,
+                        'detection_type': detection['type'],
+                        'severity': detection['severity'],
+                        'description': detection['description'],
+                        'confidence_score': detection['confidence_score']
+                    })
+
+                    # Count by type
+                    results['detections_by_type'][detection['type']] = \
+                        results['detections_by_type'].get(detection['type'], 0) + 1
+
+                    # Count by severity
+                    results['detections_by_severity'][detection['severity']] = \
+                        results['detections_by_severity'].get(detection['severity'], 0) + 1
+
+            db.session.bulk_insert_mappings(TamperDetection, tamper_records)
+            db.session.bulk_update_mappings(WaterLevelSubmission, submission_updates)
+            db.session.commit()
+        finally:
+            self._batch_distances = None
+            self._batch_stats = None
+            self._batch_user_stats = None
+
         return results
 
 # Utility function for real-time monitoring
@@ -1,4 +1,59 @@
-from math import radians, sin, cos, sqrt, atan2
+from math import radians, sin, cos, sqrt, asin
+
+import numpy as np
+
+# Numba is optional - used to JIT-compile the haversine kernels when the
+# package is installed; the pure-Python/numpy paths below stay the default
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+def calculate_distance_batch(lat1, lon1, lat2, lon2):
+    """
+    Vectorized haversine over arrays of points (decimal degrees).
+    Returns distances in meters as a numpy array; one pass over the
+    arrays replaces a Python-level trig call chain per pair.
+    """
+    if NUMBA_AVAILABLE:
+        return haversine_array(
+            np.ascontiguousarray(lat1, dtype=np.float64),
+            np.ascontiguousarray(lon1, dtype=np.float64),
+            np.ascontiguousarray(lat2, dtype=np.float64),
+            np.ascontiguousarray(lon2, dtype=np.float64)
+        )
+
+    lat1r = np.radians(np.asarray(lat1, dtype=np.float64))
+    lon1r = np.radians(np.asarray(lon1, dtype=np.float64))
+    lat2r = np.radians(np.asarray(lat2, dtype=np.float64))
+    lon2r = np.radians(np.asarray(lon2, dtype=np.float64))
+
+    a = (np.sin((lat2r - lat1r) / 2) ** 2
+         + np.cos(lat1r) * np.cos(lat2r) * np.sin((lon2r - lon1r) / 2) ** 2)
+    return 6371000 * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+if NUMBA_AVAILABLE:
+
+    @njit(cache=True, fastmath=True)
+    def _haversine(lat1, lon1, lat2, lon2):
+        lat1, lon1, lat2, lon2 = (
+            radians(lat1), radians(lon1), radians(lat2), radians(lon2)
+        )
+        a = (sin((lat2 - lat1) / 2) ** 2
+             + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2)
+        sa = sqrt(a)
+        return 6371000 * 2 * asin(sa if sa < 1 else 1)
+
+    @njit(parallel=True, cache=True, fastmath=True)
+    def haversine_array(lat1, lon1, lat2, lon2):
+        """Compiled elementwise haversine over equal-length float64 arrays"""
+        n = lat1.shape[0]
+        out = np.empty(n, dtype=np.float64)
+        for i in prange(n):
+            out[i] = _haversine(lat1[i], lon1[i], lat2[i], lon2[i])
+        return out
+
 
 def calculate_distance(lat1, lon1, lat2, lon2):
     """
@@ -6,20 +61,45 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     on the Earth (specified in decimal degrees)
     Returns distance in meters
     """
+    if NUMBA_AVAILABLE:
+        return _haversine(lat1, lon1, lat2, lon2)
+
     # Earth radius in meters
     R = 6371000
     
     # Convert decimal degrees to radians
     lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
     
-    # Haversine formula
+    # Haversine formula; asin of the clamped root needs one trig call
+    # where atan2 needs two square roots and a two-argument arctangent
     dlat = lat2 - lat1
     dlon = lon2 - lon1
     a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1-a))
-    distance = R * c
-    
-    return distance
+    sa = sqrt(a)
+    return R * 2 * asin(sa if sa < 1 else 1)
+
+def precompute_site_radians(site_lat, site_lon):
+    """
+    Pre-convert a fixed site's coordinates for repeated distance checks.
+    Returns (site_lat_r, site_lon_r, cos_site_lat) for use with
+    calculate_distance_to_site, saving the per-call conversions when
+    many user positions are checked against the same site.
+    """
+    site_lat_r = radians(site_lat)
+    return site_lat_r, radians(site_lon), cos(site_lat_r)
+
+def calculate_distance_to_site(user_lat, user_lon, site_radians):
+    """
+    Haversine distance in meters from a user position (decimal degrees)
+    to a site prepared with precompute_site_radians.
+    """
+    site_lat_r, site_lon_r, cos_site_lat = site_radians
+    lat1 = radians(user_lat)
+    dlat = site_lat_r - lat1
+    dlon = site_lon_r - radians(user_lon)
+    a = sin(dlat/2)**2 + cos(lat1) * cos_site_lat * sin(dlon/2)**2
+    sa = sqrt(a)
+    return 6371000 * 2 * asin(sa if sa < 1 else 1)
 
 def is_within_geofence(user_lat, user_lon, site_lat, site_lon, radius_meters=50):
     """
@@ -1,56 +1,269 @@
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont, UnidentifiedImageError
+import asyncio
+import functools
+import multiprocessing
 import os
 from datetime import datetime
 
+import numpy as np
+
+# PyTurboJPEG is optional - wraps libjpeg-turbo directly for a faster
+# encode than Pillow's JPEG path; the constructor raises if the shared
+# library itself is missing
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB
+    _TURBO_JPEG = TurboJPEG()
+    TURBOJPEG_AVAILABLE = True
+except (ImportError, OSError):
+    TURBOJPEG_AVAILABLE = False
+
+@functools.lru_cache(maxsize=8)
+def _get_font(name, size):
+    """Load a font once per (name, size); truetype parses the TTF from
+    disk on every call otherwise. The cached instance is safe to share
+    across Draw objects. The basic layout engine skips Raqm complex-text
+    shaping, which the plain-Latin overlay never needs."""
+    layout = getattr(ImageFont, 'Layout', None)
+    try:
+        if layout is not None:
+            return ImageFont.truetype(name, size, layout_engine=layout.BASIC)
+        return ImageFont.truetype(name, size)
+    except OSError:
+        return ImageFont.load_default()
+
+# Every character the overlay text can contain: digits, separators, and
+# the letters of the "Lat:"/"Lon:" labels
+_GLYPH_CHARS = '0123456789:-., Laton'
+
+# Bound format method: dispatching it skips per-call f-string parsing
+_LOC_FMT = "Lat: {:.6f}, Lon: {:.6f}".format
+
+@functools.lru_cache(maxsize=4)
+def _glyph_atlas(font):
+    """Pre-render each overlay character into a small RGBA tile.
+
+    The overlay only ever shows digits, separators, and two fixed
+    labels, so FreeType shaping/rasterization can be paid once per
+    character instead of once per string; rendering then becomes a
+    series of pastes at precomputed advances.
+    """
+    ascent, descent = font.getmetrics()
+    line_height = ascent + descent + 4
+    glyphs = {}
+    for ch in _GLYPH_CHARS:
+        advance = max(1, round(font.getlength(ch)))
+        tile = Image.new('RGBA', (advance + 2, line_height), (0, 0, 0, 0))
+        ImageDraw.Draw(tile).text((0, 0), ch, fill='white', font=font)
+        glyphs[ch] = (tile, advance)
+    return glyphs, line_height
+
+def _draw_string_fast(base, x, y, s, glyphs):
+    """Blit pre-rendered glyph tiles; no shaping on the hot path.
+    Advance-based placement drops kerning, imperceptible at overlay
+    sizes for digits and plain Latin labels."""
+    for ch in s:
+        tile, advance = glyphs[ch]
+        base.paste(tile, (x, y), tile)
+        x += advance
+
+# Worst-case overlay text: every digit position filled, signed
+# coordinates at full width. Its bbox bounds any real overlay string.
+_SAMPLE_TEXT = "9999-99-99 99:99:99\nLat: -99.999999, Lon: -999.999999"
+
+@functools.lru_cache(maxsize=4)
+def _fixed_bbox(font):
+    """Measure the representative string once per font.
+
+    The overlay format is fixed - only digits vary - so one measurement
+    bounds every real string. Proportional fonts can differ by a couple
+    of pixels per digit, which just leaves a sliver more padding.
+    getlength only computes X-advances, skipping textbbox's full
+    multiline layout and Y-metric work; fonts without it (or a size
+    attribute) keep the textbbox measurement.
+    """
+    lines = _SAMPLE_TEXT.split('\n')
+    if getattr(font, 'getlength', None) and getattr(font, 'size', None):
+        width = int(max(font.getlength(line) for line in lines))
+        height = 2 * font.size + 4
+        return width, height
+
+    measure = ImageDraw.Draw(Image.new('RGBA', (1, 1)))
+    bbox = measure.textbbox((0, 0), _SAMPLE_TEXT, font=font)
+    return bbox[2] - bbox[0], bbox[3] - bbox[1]
+
+@functools.lru_cache(maxsize=32)
+def _render_overlay(timestamp_str, location_str):
+    """Rasterize the black box plus white text into an RGBA sprite,
+    cached per distinct string pair. Images stamped within the same
+    second reuse the sprite, so the per-image work shrinks to a single
+    paste instead of a measure + rectangle + text draw."""
+    font = _get_font("arial.ttf", 30)
+
+    glyphs = None
+    if hasattr(font, 'getmetrics') and hasattr(font, 'getlength'):
+        glyphs, line_height = _glyph_atlas(font)
+
+    lines = (timestamp_str, location_str)
+    if glyphs is not None and all(ch in glyphs for line in lines for ch in line):
+        width = max(sum(glyphs[ch][1] for ch in line) for line in lines)
+        overlay = Image.new('RGBA', (width + 10, 2 * line_height + 10), (0, 0, 0, 255))
+        _draw_string_fast(overlay, 5, 5, timestamp_str, glyphs)
+        _draw_string_fast(overlay, 5, 5 + line_height, location_str, glyphs)
+        return overlay
+
+    # Fallback for fonts without length metrics or unexpected characters:
+    # shape the whole string through FreeType, sized by the fixed bbox
+    # measured once per font instead of a textbbox call per string
+    text = f"{timestamp_str}\n{location_str}"
+    text_width, text_height = _fixed_bbox(font)
+
+    overlay = Image.new('RGBA', (text_width + 10, text_height + 10), (0, 0, 0, 255))
+    draw = ImageDraw.Draw(overlay)
+    draw.text((5, 5), text, fill='white', font=font)
+    return overlay
+
+def _atomic_save(image_path, write_fn):
+    """Encode into a sibling temp file, then rename over the target.
+
+    A crash or full disk mid-encode leaves the original image intact
+    instead of a truncated file; the 1 MB buffer keeps the encoder
+    feeding large sequential writes. os.replace is atomic on POSIX and
+    Windows for same-directory renames.
+    """
+    tmp_path = image_path + '.tmp'
+    try:
+        with open(tmp_path, 'wb', buffering=1 << 20) as f:
+            write_fn(f)
+        os.replace(tmp_path, image_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
 def add_timestamp_to_image(image_path, timestamp, latitude, longitude):
     """
     Add timestamp and location metadata overlay to the captured image
     """
     try:
-        # Open the image
-        with Image.open(image_path) as img:
-            # Convert to RGB if necessary
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
+        # Open the image; uploads are only ever JPEG or PNG (see
+        # ALLOWED_EXTENSIONS), so skip sniffing every registered plugin
+        with Image.open(image_path, formats=('JPEG', 'PNG')) as img:
+            # draft lets libjpeg decode straight to RGB and skip chroma
+            # upsampling stages it does not need; a no-op for PNGs
+            img.draft('RGB', img.size)
+            # Capture source JPEG quantization tables, EXIF, and format
+            # before any convert() drops them; all are reused at save time
+            qtables = getattr(img, 'quantization', None)
+            exif = img.info.get('exif')
+            src_format = img.format
             
-            draw = ImageDraw.Draw(img)
-            
-            # Try to use a font, fallback to default if not available
-            try:
-                font = ImageFont.truetype("arial.ttf", 30)
-            except:
-                font = ImageFont.load_default()
-            
-            # Format the text
-            timestamp_str = timestamp.strftime("%Y-%m-%d %H:%M:%S")
-            location_str = f"Lat: {latitude:.6f}, Lon: {longitude:.6f}"
+            # Draw in the native mode when paste supports it; converting
+            # RGBA or grayscale up front copied every pixel for nothing
+            if img.mode not in ('RGB', 'RGBA', 'L'):
+                img = img.convert('RGB')
             
-            # Add text background for better readability
-            text = f"{timestamp_str}\n{location_str}"
-            bbox = draw.textbbox((0, 0), text, font=font)
-            text_width = bbox[2] - bbox[0]
-            text_height = bbox[3] - bbox[1]
+            # Format the text; isoformat is implemented in C and renders
+            # the same "YYYY-MM-DD HH:MM:SS" layout strftime produced
+            timestamp_str = timestamp.isoformat(sep=' ', timespec='seconds')
+            location_str = _LOC_FMT(latitude, longitude)
             
-            # Draw background rectangle
+            # Paste the cached overlay sprite (background + text in one);
+            # integer coordinates keep everything on the pixel grid so
+            # no subpixel re-rasterization can sneak in
             margin = 10
-            draw.rectangle([
-                margin, 
-                margin, 
-                margin + text_width + 10, 
-                margin + text_height + 10
-            ], fill='black')
+            overlay = _render_overlay(timestamp_str, location_str)
+            img.paste(overlay, (int(margin), int(margin)), overlay)
             
-            # Draw text
-            draw.text((margin + 5, margin + 5), text, fill='white', font=font)
-            
-            # Save the modified image
-            img.save(image_path)
+            # Save with explicit parameters: naming the format skips
+            # extension re-inference, optimize=False avoids the second
+            # Huffman pass, and level-1 deflate is plenty for photos
+            ext = os.path.splitext(image_path)[1].lower()
+            if ext in ('.jpg', '.jpeg'):
+                # JPEG cannot hold an alpha channel, so only this target
+                # forces a conversion, and only just before the save
+                if img.mode == 'RGBA':
+                    img = img.convert('RGB')
+                # libjpeg-turbo encodes markedly faster, but cannot
+                # carry over source quantization tables or EXIF, so it
+                # only takes sources with neither to preserve
+                if TURBOJPEG_AVAILABLE and img.mode == 'RGB' and not qtables and not exif:
+                    buf = _TURBO_JPEG.encode(
+                        np.asarray(img), quality=85, pixel_format=TJPF_RGB
+                    )
+                    _atomic_save(image_path, lambda f: f.write(buf))
+                    return True
+                save_kwargs = {'format': 'JPEG', 'optimize': False,
+                               'progressive': False}
+                if qtables:
+                    # Re-encode with the source's own quantization
+                    # tables: bit-identical fidelity outside the overlay
+                    # and no quality-to-table lookup
+                    save_kwargs['qtables'] = qtables
+                else:
+                    save_kwargs['quality'] = 85
+                if exif:
+                    save_kwargs['exif'] = exif
+            elif ext == '.png':
+                save_kwargs = {'format': 'PNG', 'compress_level': 1}
+            else:
+                # Saving to a file object needs an explicit format; keep
+                # whatever the source decoder reported
+                save_kwargs = {'format': src_format}
+
+            if save_kwargs.get('format'):
+                _atomic_save(image_path,
+                             lambda f: img.save(f, **save_kwargs))
+            else:
+                img.save(image_path)
             return True
             
-    except Exception as e:
+    except (OSError, UnidentifiedImageError) as e:
+        # Expected failure modes: unreadable/corrupt file or a full disk.
+        # Anything else is a programming error and should surface to the
+        # caller instead of being flattened into False
         print(f"Error adding timestamp to image: {e}")
         return False
 
+def stamp_images(entries, workers=None):
+    """Stamp a batch of images across processes.
+
+    entries is a sequence of (image_path, timestamp, latitude,
+    longitude) tuples. JPEG decode/encode dominates the cost and runs
+    in C, so spreading images over cores scales close to linearly; the
+    font, glyph, and overlay caches are per-process and warm up once in
+    each worker. Returns a list of booleans aligned with the input.
+    """
+    entries = list(entries)
+    if not entries:
+        return []
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(entries) == 1:
+        return [add_timestamp_to_image(*entry) for entry in entries]
+
+    with multiprocessing.Pool(min(workers, len(entries))) as pool:
+        return pool.starmap(add_timestamp_to_image, entries, chunksize=4)
+
+async def add_timestamp_to_image_async(image_path, timestamp, latitude, longitude):
+    """Async wrapper around add_timestamp_to_image.
+
+    Runs the decode/stamp/encode on a worker thread so an event-loop
+    caller is never blocked on disk or codec work; PIL releases the GIL
+    inside its C codecs, so several of these can genuinely overlap.
+    Batch callers can asyncio.gather a bounded number of them, e.g.:
+
+        sem = asyncio.Semaphore(8)
+        async def one(entry):
+            async with sem:
+                return await add_timestamp_to_image_async(*entry)
+        results = await asyncio.gather(*(one(e) for e in entries))
+    """
+    return await asyncio.to_thread(
+        add_timestamp_to_image, image_path, timestamp, latitude, longitude
+    )
+
 def analyze_water_gauge(image_path):
     """
     Analyze the image using Gemini API to read the water level gauge.
@@ -4,7 +4,9 @@ from datetime import datetime
 from twilio.rest import Client
 from twilio.twiml.messaging_response import MessagingResponse
 from models import db, WhatsAppSubscriber, MonitoringSite, FloodAlert, WaterLevelSubmission
-from utils.geofence import calculate_distance
+from utils.geofence import (
+    calculate_distance, calculate_distance_to_site, precompute_site_radians
+)
 from utils.weather import get_rainfall_prediction
 
 # Configure logging
@@ -170,13 +172,15 @@ class WhatsAppService:
         )
         db.session.add(alert)
         
-        # Find subscribers within radius
+        # Find subscribers within radius; the site's coordinates are fixed
+        # across the loop, so convert them to radians once up front
         subscribers = WhatsAppSubscriber.query.filter_by(is_active=True).all()
+        site_radians = precompute_site_radians(site.latitude, site.longitude)
         count = 0
         
         for sub in subscribers:
             if sub.latitude and sub.longitude:
-                dist = calculate_distance(sub.latitude, sub.longitude, site.latitude, site.longitude)
+                dist = calculate_distance_to_site(sub.latitude, sub.longitude, site_radians)
                 if dist <= alert_radius_meters:
                     if self.send_message(sub.phone_number, alert.message):
                         count += 1
@@ -202,13 +206,15 @@ class WhatsAppService:
         )
         db.session.add(alert)
         
-        # Find subscribers within radius
+        # Find subscribers within radius; the site's coordinates are fixed
+        # across the loop, so convert them to radians once up front
         subscribers = WhatsAppSubscriber.query.filter_by(is_active=True).all()
+        site_radians = precompute_site_radians(site.latitude, site.longitude)
         count = 0
         
         for sub in subscribers:
             if sub.latitude and sub.longitude:
-                dist = calculate_distance(sub.latitude, sub.longitude, site.latitude, site.longitude)
+                dist = calculate_distance_to_site(sub.latitude, sub.longitude, site_radians)
                 if dist <= alert_radius_meters:
                     if self.send_message(sub.phone_number, alert.message):
                         count += 1
@@ -258,11 +264,12 @@ class WhatsAppService:
                 alert_radius_km = 10
                 alert_radius_meters = alert_radius_km * 1000
                 subscribers = WhatsAppSubscriber.query.filter_by(is_active=True).all()
+                site_radians = precompute_site_radians(site.latitude, site.longitude)
                 count = 0
                 
                 for sub in subscribers:
                     if sub.latitude and sub.longitude:
-                        dist = calculate_distance(sub.latitude, sub.longitude, site.latitude, site.longitude)
+                        dist = calculate_distance_to_site(sub.latitude, sub.longitude, site_radians)
                         if dist <= alert_radius_meters:
                             if self.send_message(sub.phone_number, alert.message):
                                 count += 1